@@ -0,0 +1,263 @@
+import sys
+import io
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+from contextlib import redirect_stdout
+
+from main import PrePro, Tokenizer, Parser, VarDeC, BytecodeCompiler, VM
+
+
+# geradores de programas sintéticos: cada eixo cresce numa direção diferente
+
+def expressionChain(n):
+    # cadeia longa de operações sobre um parâmetro (o ConstantFolder não consegue dobrar)
+    terms = " ".join(f"{'+' if i % 2 else '-'} x * {i % 7 + 1}" for i in range(n))
+    return f"fn chain(x: i32) i32 {{\n  return x {terms};\n}}\n\nfn main() void {{\n  printf(chain(3));\n}}\n"
+
+
+def deepNesting(n):
+    opening = "".join(f"{'  ' * (i + 1)}if (x < {n + i}) {{\n{'  ' * (i + 2)}x = x + 1;\n" for i in range(n))
+    closing = "".join(f"{'  ' * (i + 1)}}}\n" for i in reversed(range(n)))
+    return f"fn run(x: i32) i32 {{\n{opening}{closing}  return x;\n}}\n\nfn main() void {{\n  printf(run(0));\n}}\n"
+
+
+def manyVariables(n):
+    lines = ["  var v0: i32 = x;"]
+    lines += [f"  var v{i}: i32 = v{i - 1} + {i % 5};" for i in range(1, n)]
+    lines += [f"  v{i} = v{i} - v{i - 1};" for i in range(1, n, 2)]
+    return "fn run(x: i32) i32 {\n" + "\n".join(lines) + f"\n  return v{n - 1};\n}}\n\nfn main() void {{\n  printf(run(1));\n}}\n"
+
+
+def tightLoop(n):
+    return (
+        "fn main() void {\n"
+        "  var i: i32 = 0;\n"
+        "  var s: i32 = 0;\n"
+        f"  while (i < {n}) {{\n"
+        "    s = s + i * 2 - s / 3;\n"
+        "    i = i + 1;\n"
+        "  }\n"
+        "  printf(s);\n"
+        "}\n"
+    )
+
+
+def deepRecursion(n):
+    # sem chamada em posição de cauda: cada nível empilha de verdade
+    return (
+        "fn down(n: i32) i32 {\n"
+        "  if (n == 0) {\n"
+        "    return 0;\n"
+        "  }\n"
+        "  return 1 + down(n - 1);\n"
+        "}\n\n"
+        f"fn main() void {{\n  printf(down({n}));\n}}\n"
+    )
+
+
+def manyFunctions(n):
+    functions = ["fn f0(x: i32) i32 {\n  return x + 1;\n}\n"]
+    functions += [f"fn f{i}(x: i32) i32 {{\n  var y: i32 = x * 2;\n  return f{i - 1}(y - x) + 1;\n}}\n"
+                  for i in range(1, n)]
+    return "\n".join(functions) + f"\nfn main() void {{\n  printf(f{n - 1}(0));\n}}\n"
+
+
+AXES = {
+    "expressions": (expressionChain, [250, 500, 1000, 2000]),
+    "nesting": (deepNesting, [50, 100, 200, 400]),
+    "variables": (manyVariables, [250, 500, 1000, 2000]),
+    "loop": (tightLoop, [2500, 5000, 10000, 20000]),
+    "recursion": (deepRecursion, [250, 500, 1000, 2000]),
+    "functions": (manyFunctions, [50, 100, 200, 400]),
+}
+
+
+# fases: cada uma recebe o fonte filtrado e devolve uma função que executa só a fase medida
+
+def tokenizePhase(source):
+    def run():
+        for _ in Tokenizer(source, 0, None).tokens():
+            pass
+    return run
+
+
+def parsePhase(source):
+    return lambda: Parser.parse(source)
+
+
+def analyzePhase(source):
+    root = Parser.parse(source)
+
+    def run():
+        Parser.analyzeTree(root)
+    return run
+
+
+def evaluatePhase(source):
+    root, main_call = Parser.analyze(source)
+
+    def run():
+        global_frame = [None] * len(root.global_names)
+        global_frame[0] = global_frame
+
+        with redirect_stdout(io.StringIO()):
+            for node in root.children:
+                if isinstance(node, VarDeC):
+                    node.Evaluate(global_frame)
+            main_call.Evaluate(global_frame)
+    return run
+
+
+def vmPhase(source):
+    root, main_call = Parser.analyze(source)
+
+    def run():
+        program = BytecodeCompiler().compileProgram(root, main_call)
+
+        with redirect_stdout(io.StringIO()):
+            VM(program).run()
+    return run
+
+
+def generatePhase(source):
+    root, main_call = Parser.analyze(source)
+    output = os.path.join(tempfile.mkdtemp(), "bench.zig")
+
+    def run():
+        code = Parser.generateProgram(root, main_call)
+        code.optimize()
+        code.dump(output)
+    return run
+
+
+PHASES = {
+    "tokenize": tokenizePhase,
+    "parse": parsePhase,
+    "analyze": analyzePhase,
+    "evaluate": evaluatePhase,
+    "vm": vmPhase,
+    "generate": generatePhase,
+}
+
+
+def measure(phase, source, repeat):
+    best = None
+
+    # cada repetição prepara o próprio estado (árvores são modificadas pelas fases)
+    for _ in range(repeat):
+        run = PHASES[phase](source)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # o pico de memória vem de uma execução à parte: o tracemalloc distorce o tempo
+    run = PHASES[phase](source)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def runSuite(axes, phases, repeat, quick):
+    results = []
+
+    for axis in axes:
+        generator, sizes = AXES[axis]
+
+        for size in sizes[:2] if quick else sizes:
+            source = PrePro.filter(generator(size))
+
+            for phase in phases:
+                try:
+                    seconds, peak = measure(phase, source, repeat)
+                    record = {"axis": axis, "size": size, "phase": phase,
+                              "seconds": round(seconds, 6), "peak_bytes": peak}
+                except Exception as e:
+                    record = {"axis": axis, "size": size, "phase": phase, "error": f"{type(e).__name__}: {e}"}
+
+                results.append(record)
+                printRecord(record)
+
+    return results
+
+
+def printRecord(record):
+    if "error" in record:
+        print(f"{record['axis']:>12} {record['size']:>7} {record['phase']:>9}  erro: {record['error']}")
+    else:
+        print(f"{record['axis']:>12} {record['size']:>7} {record['phase']:>9}  "
+              f"{record['seconds'] * 1000:10.2f} ms  {record['peak_bytes'] / 1024:10.1f} KiB")
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {(r["axis"], r["size"], r["phase"]): r for r in json.load(f)["results"] if "error" not in r}
+
+    regressions = 0
+
+    for record in results:
+        old = baseline.get((record["axis"], record["size"], record["phase"]))
+
+        if old is None or "error" in record:
+            continue
+
+        ratio = record["seconds"] / old["seconds"] if old["seconds"] else 1.0
+
+        if ratio > threshold:
+            regressions += 1
+            print(f"regressão: {record['axis']} {record['size']} {record['phase']}: "
+                  f"{old['seconds'] * 1000:.2f} ms -> {record['seconds'] * 1000:.2f} ms ({ratio:.2f}x)")
+
+    print(f"{regressions} regressões acima de {threshold:.2f}x")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmarks de escala do compilador por fase.")
+    arg_parser.add_argument("--axes", nargs="+", choices=list(AXES), default=list(AXES))
+    arg_parser.add_argument("--phases", nargs="+", choices=list(PHASES), default=list(PHASES))
+    arg_parser.add_argument("--repeat", type=int, default=3, help="repetições por medida; vale a melhor (padrão: 3)")
+    arg_parser.add_argument("--quick", action="store_true", help="só os dois menores tamanhos de cada eixo")
+    arg_parser.add_argument("--output", default="bench_results.json", help="arquivo JSON com os resultados")
+    arg_parser.add_argument("--compare", metavar="BASELINE", help="JSON de uma execução anterior para comparar")
+    arg_parser.add_argument("--threshold", type=float, default=1.25,
+                            help="razão de tempo acima da qual a comparação acusa regressão (padrão: 1.25)")
+    args = arg_parser.parse_args()
+
+    results = runSuite(args.axes, args.phases, args.repeat, args.quick)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }, f, indent=2)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    # árvores fundas recursam no Python: pilha e limite maiores numa thread própria
+    sys.setrecursionlimit(1_000_000)
+    threading.stack_size(512 * 1024 * 1024)
+    status = []
+    thread = threading.Thread(target=lambda: status.append(main()))
+    thread.start()
+    thread.join()
+    sys.exit(status[0] if status else 1)
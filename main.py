@@ -1,12 +1,267 @@
 import sys
 import re
+import argparse
+import io
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from itertools import repeat
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
 import os
+import hashlib
+import codecs
+import pickle
+import json
+
+
+ASM_DATA = """section .data
+   format_out db "%d", 10, 0
+   format_in db "%d", 0
+   format_str db "%.*s", 10, 0
+   scan_int dd 0
+"""
+
+ASM_TEXT = """
+section .text
+
+   extern printf
+   extern scanf
+   extern exit
+   extern _ExitProcess@4
+   global _start
+
+_start:
+   push ebp
+   mov ebp, esp
+
+"""
+
+EXIT_SEQUENCE = [
+    "mov esp, ebp",
+    "pop ebp",
+    "mov eax, 1",
+    "xor ebx, ebx",
+    "int 0x80",
+]
+
+
+# strings: o valor é o endereço de um descritor {ponteiro, tamanho}. Literais ficam num pool
+# em .data; "++" aloca descritor e bytes em duas arenas de bump em .bss, sem free
+STRING_ARENA_BYTES = 1 << 26
+STRING_ARENA_DESCRIPTORS = 1 << 20
+
+STRING_ARENAS = [
+    f"str_bytes resb {STRING_ARENA_BYTES}",
+    "str_bytes_end:",
+    f"str_descs resb {8 * STRING_ARENA_DESCRIPTORS}",
+    "str_descs_end:",
+]
+
+STRING_DATA = [
+    "str_bytes_top dd str_bytes",
+    "str_descs_top dd str_descs",
+    'rt_erro_strings db "Erro: memória de strings esgotada.", 10, 0',
+]
+
+# rotinas cdecl: devolvem o descritor em eax e preservam ebx/esi/edi
+STRING_RUNTIME = {
+    # rt_concat(a, b): bytes de a seguidos dos de b na memória já são o resultado; se os de a
+    # terminam no topo da arena, só os de b são copiados
+    "rt_concat": [
+        "rt_concat:",
+        "push ebp",
+        "mov ebp, esp",
+        "push esi",
+        "push edi",
+        "mov eax, [ebp+12]",
+        "mov edx, [ebp+8]",
+        "cmp dword [edx+4], 0",
+        "je rt_concat_fim",
+        "mov eax, edx",
+        "mov edx, [ebp+12]",
+        "cmp dword [edx+4], 0",
+        "je rt_concat_fim",
+        "mov eax, [str_descs_top]",
+        "lea ecx, [eax+8]",
+        "cmp ecx, str_descs_end",
+        "ja rt_sem_memoria",
+        "mov [str_descs_top], ecx",
+        "mov esi, [ebp+8]",
+        "mov ecx, [esi+4]",
+        "add ecx, [edx+4]",
+        "mov [eax+4], ecx",
+        "mov edi, [esi]",
+        "add edi, [esi+4]",
+        "cmp edi, [edx]",
+        "je rt_concat_vizinhas",
+        "cmp edi, [str_bytes_top]",
+        "je rt_concat_estende",
+        "mov edi, [str_bytes_top]",
+        "add ecx, edi",
+        "cmp ecx, str_bytes_end",
+        "ja rt_sem_memoria",
+        "mov [eax], edi",
+        "mov ecx, [esi+4]",
+        "mov esi, [esi]",
+        "rep movsb",
+        "jmp rt_concat_copia",
+        "rt_concat_estende:",
+        "mov ecx, [edx+4]",
+        "add ecx, edi",
+        "cmp ecx, str_bytes_end",
+        "ja rt_sem_memoria",
+        "mov ecx, [esi]",
+        "mov [eax], ecx",
+        "rt_concat_copia:",
+        "mov esi, [edx]",
+        "mov ecx, [edx+4]",
+        "rep movsb",
+        "mov [str_bytes_top], edi",
+        "jmp rt_concat_fim",
+        "rt_concat_vizinhas:",
+        "mov ecx, [esi]",
+        "mov [eax], ecx",
+        "rt_concat_fim:",
+        "pop edi",
+        "pop esi",
+        "pop ebp",
+        "ret",
+    ],
+    # rt_itos(n): os dígitos saem de trás para frente num buffer da pilha; os restos
+    # são tirados do valor negativo para -2^31 não estourar
+    "rt_itos": [
+        "rt_itos:",
+        "push ebp",
+        "mov ebp, esp",
+        "push esi",
+        "push edi",
+        "sub esp, 12",
+        "lea edi, [ebp-8]",
+        "mov eax, [ebp+8]",
+        "test eax, eax",
+        "js rt_itos_digito",
+        "neg eax",
+        "rt_itos_digito:",
+        "cdq",
+        "mov ecx, 10",
+        "idiv ecx",
+        "mov ecx, 48",
+        "sub ecx, edx",
+        "dec edi",
+        "mov byte [edi], cl",
+        "test eax, eax",
+        "jnz rt_itos_digito",
+        "cmp dword [ebp+8], 0",
+        "jge rt_itos_copia",
+        "dec edi",
+        "mov byte [edi], 45",
+        "rt_itos_copia:",
+        "lea ecx, [ebp-8]",
+        "sub ecx, edi",
+        "mov esi, edi",
+        "mov eax, [str_descs_top]",
+        "lea edx, [eax+8]",
+        "cmp edx, str_descs_end",
+        "ja rt_sem_memoria",
+        "mov [str_descs_top], edx",
+        "mov [eax+4], ecx",
+        "mov edi, [str_bytes_top]",
+        "mov [eax], edi",
+        "lea edx, [edi+ecx]",
+        "cmp edx, str_bytes_end",
+        "ja rt_sem_memoria",
+        "rep movsb",
+        "mov [str_bytes_top], edi",
+        "lea esp, [ebp-8]",
+        "pop edi",
+        "pop esi",
+        "pop ebp",
+        "ret",
+    ],
+    # rt_compara(a, b): negativo, zero ou positivo, comparando bytes sem sinal e, num
+    # prefixo comum, o tamanho
+    "rt_compara": [
+        "rt_compara:",
+        "push ebp",
+        "mov ebp, esp",
+        "push esi",
+        "push edi",
+        "mov esi, [ebp+8]",
+        "mov edi, [ebp+12]",
+        "mov eax, [esi+4]",
+        "sub eax, [edi+4]",
+        "push eax",
+        "mov ecx, [esi+4]",
+        "cmp ecx, [edi+4]",
+        "jle rt_compara_inicio",
+        "mov ecx, [edi+4]",
+        "rt_compara_inicio:",
+        "mov esi, [esi]",
+        "mov edi, [edi]",
+        "rt_compara_laco:",
+        "test ecx, ecx",
+        "jz rt_compara_tamanho",
+        "movzx eax, byte [esi]",
+        "movzx edx, byte [edi]",
+        "cmp eax, edx",
+        "jne rt_compara_diferente",
+        "inc esi",
+        "inc edi",
+        "dec ecx",
+        "jmp rt_compara_laco",
+        "rt_compara_diferente:",
+        "sub eax, edx",
+        "jmp rt_compara_fim",
+        "rt_compara_tamanho:",
+        "mov eax, [ebp-12]",
+        "rt_compara_fim:",
+        "lea esp, [ebp-8]",
+        "pop edi",
+        "pop esi",
+        "pop ebp",
+        "ret",
+    ],
+}
+
+STRING_OUT_OF_MEMORY = ["rt_sem_memoria:", "push rt_erro_strings", "call printf", "push 1", "call exit"]
 
 
 class Code:
     def __init__(self):
         self.instructions = []
+        self.data = []
+        self.bss = []
+        # pool de literais: texto -> rótulo do descritor
+        self.strings = {}
+        self.runtime = set()
+
+    def string(self, text):
+        if text not in self.strings:
+            label = f"str_{len(self.strings)}"
+            encoded = text.encode("utf-8")
+
+            if encoded:
+                self.data.append(f"{label}_txt db {', '.join(str(b) for b in encoded)}")
+                self.data.append(f"{label} dd {label}_txt, {len(encoded)}")
+            else:
+                self.data.append(f"{label} dd 0, 0")
+
+            self.strings[text] = label
+
+        return self.strings[text]
+
+    def appendRuntime(self):
+        if not self.runtime:
+            return
+
+        for name in sorted(self.runtime):
+            self.append(STRING_RUNTIME[name])
+
+        self.append(STRING_OUT_OF_MEMORY)
+        self.data.extend(STRING_DATA)
+        self.bss.extend(STRING_ARENAS)
 
     def append(self, instruction):
         if isinstance(instruction, list):
@@ -16,94 +271,405 @@ class Code:
 
     def dump(self, input_filename="output.zig"):
         output_name = os.path.splitext(input_filename)[0] + ".asm"
-        
+
         with open(output_name, "w") as f:
-            f.write("section .data\n")
-            f.write('   format_out db "%d", 10, 0\n')
-            f.write('   format_in db "%d", 0\n')
-            f.write("   scan_int dd 0\n\n")
-
-            f.write("section .text\n\n")
-            f.write("   extern printf\n")
-            f.write("   extern scanf\n")
-            f.write("   extern _ExitProcess@4\n")
-            f.write("   global _start\n\n")
-            f.write("_start:\n")
-            f.write("   push ebp\n")
-            f.write("   mov ebp, esp\n\n")
-
-            for instr in self.instructions:
-                f.write("   " + instr + "\n")
-
-            f.write("\n")
-            f.write("   mov esp, ebp\n")
-            f.write("   pop ebp\n\n")
-            f.write("   mov eax, 1\n")
-            f.write("   xor ebx, ebx\n")
-            f.write("   int 0x80\n")
+            f.write(ASM_DATA)
+            f.writelines(f"   {line}\n" for line in self.data)
+
+            if self.bss:
+                f.write("\nsection .bss\n")
+                f.writelines(f"   {line}\n" for line in self.bss)
+
+            f.write(ASM_TEXT)
+            # o corpo vai em blocos pelo buffer do arquivo, sem montar uma string única
+            f.writelines(f"   {instr}\n" for instr in self.instructions)
+
+    def optimize(self, level=2, rules=None):
+        peephole = Peephole(level, rules)
+        self.instructions = peephole.optimize(self.instructions)
+        return peephole.removed
+
+
+NEGATED_CONDITIONS = {"e": "ne", "ne": "e", "l": "ge", "ge": "l", "g": "le", "le": "g"}
+
+
+def parseInstruction(instruction):
+    text = instruction.split(";", 1)[0].strip()
+
+    if text.endswith(":"):
+        return ("label", [text[:-1]])
+
+    mnemonic, _, operands = text.partition(" ")
+    # "dword [x]" e "[x]" são o mesmo endereço para as regras
+    return (mnemonic, [o.strip().replace("dword ", "") for o in operands.split(",")] if operands else [])
+
+
+class Peephole:
+    # regras de cada nível; toda reescrita encolhe a lista, então o ponto fixo sempre chega
+    LEVELS = {
+        0: [],
+        1: ["pushPop", "storeLoad", "selfMove", "jumpToNext"],
+        2: ["pushPop", "storeLoad", "selfMove", "jumpToNext",
+            "branchOnFlag", "redundantCompare", "mergeStackReserve", "unreachable"],
+    }
+
+    def __init__(self, level=2, rules=None):
+        if rules is None:
+            if level not in self.LEVELS:
+                raise ValueError(f"Nível de otimização inválido: {level}")
+            rules = self.LEVELS[level]
+
+        self.rules = [getattr(self, name) for name in rules]
+        self.removed = {name: 0 for name in rules}
+
+    def optimize(self, instructions):
+        changed = True
+        # só as instruções novas são analisadas de novo; o resto reaproveita a forma já parseada
+        parsed = [parseInstruction(instr) for instr in instructions]
+
+        while changed:
+            changed = False
+
+            for rule in self.rules:
+                result = []
+                result_parsed = []
+                i = 0
+
+                while i < len(instructions):
+                    match = rule(parsed, i)
+
+                    if match is None:
+                        result.append(instructions[i])
+                        result_parsed.append(parsed[i])
+                        i += 1
+                    else:
+                        consumed, replacement = match
+                        result.extend(replacement)
+                        result_parsed.extend(parseInstruction(instr) for instr in replacement)
+                        self.removed[rule.__name__] += consumed - len(replacement)
+                        i += consumed
+                        changed = True
+
+                instructions = result
+                parsed = result_parsed
+
+        return instructions
+
+    # push x / pop r -> mov r, x
+    def pushPop(self, parsed, i):
+        if i + 1 < len(parsed) and parsed[i][0] == "push" and parsed[i + 1][0] == "pop":
+            source, target = parsed[i][1][0], parsed[i + 1][1][0]
+
+            if target in ALL_REGISTERS:
+                return (2, [] if source == target else [f"mov {target}, {source}"])
+
+    # mov [m], r / mov r, [m] -> o valor já está em r
+    def storeLoad(self, parsed, i):
+        if i + 1 < len(parsed) and parsed[i][0] == "mov" and parsed[i + 1][0] == "mov":
+            memory, register = parsed[i][1]
+
+            if memory.startswith("[") and register in ALL_REGISTERS and parsed[i + 1][1] == [register, memory]:
+                return (2, [self.render(parsed[i])])
+
+    def selfMove(self, parsed, i):
+        if parsed[i][0] == "mov" and parsed[i][1][0] == parsed[i][1][1]:
+            return (1, [])
+
+    # salto para o rótulo que vem logo em seguida
+    def jumpToNext(self, parsed, i):
+        mnemonic, operands = parsed[i]
+
+        if mnemonic.startswith("j"):
+            j = i + 1
+            while j < len(parsed) and parsed[j][0] == "label":
+                if parsed[j][1][0] == operands[0]:
+                    return (1, [])
+                j += 1
+
+    # set<cc> al / movzx eax, al / [xor eax, 1] / cmp eax, 0 / je L -> j<!cc> L
+    # o booleano só alimenta o desvio: cada comando recalcula eax
+    def branchOnFlag(self, parsed, i):
+        mnemonic, operands = parsed[i]
+
+        if not (mnemonic.startswith("set") and operands == ["al"] and i + 3 < len(parsed)):
+            return None
+
+        condition = mnemonic[3:]
+        j = i + 1
+
+        if parsed[j] != ("movzx", ["eax", "al"]):
+            return None
+        j += 1
+
+        if parsed[j] == ("xor", ["eax", "1"]):
+            condition = NEGATED_CONDITIONS[condition]
+            j += 1
+
+        if j + 1 < len(parsed) and parsed[j] == ("cmp", ["eax", "0"]) and parsed[j + 1][0] in ("je", "jne"):
+            if parsed[j + 1][0] == "je":
+                condition = NEGATED_CONDITIONS[condition]
+            return (j + 2 - i, [f"j{condition} {parsed[j + 1][1][0]}"])
+
+    # and/or/add/sub/xor já ajustam ZF conforme o resultado
+    def redundantCompare(self, parsed, i):
+        if (i + 2 < len(parsed) and parsed[i][0] in ("and", "or", "add", "sub", "xor")
+                and parsed[i][1][0] == "eax" and parsed[i + 1] == ("cmp", ["eax", "0"])
+                and parsed[i + 2][0] in ("je", "jne")):
+            return (2, [self.render(parsed[i])])
+
+    def mergeStackReserve(self, parsed, i):
+        if (i + 1 < len(parsed) and parsed[i][0] == "sub" and parsed[i + 1][0] == "sub"
+                and parsed[i][1][0] == "esp" and parsed[i + 1][1][0] == "esp"
+                and parsed[i][1][1].isdigit() and parsed[i + 1][1][1].isdigit()):
+            return (2, [f"sub esp, {int(parsed[i][1][1]) + int(parsed[i + 1][1][1])}"])
+
+    # nada depois de um jmp é alcançado até o próximo rótulo
+    def unreachable(self, parsed, i):
+        if parsed[i][0] == "jmp":
+            j = i + 1
+            while j < len(parsed) and parsed[j][0] != "label":
+                j += 1
+
+            if j > i + 1:
+                return (j - i, [self.render(parsed[i])])
+
+    @staticmethod
+    def render(instruction):
+        mnemonic, operands = instruction
+
+        # sem registrador na instrução, o tamanho do acesso à memória precisa ser explícito
+        if not any(o in ALL_REGISTERS for o in operands):
+            operands = [f"dword {o}" if o.startswith("[") else o for o in operands]
+
+        return f"{mnemonic} {', '.join(operands)}" if operands else mnemonic
 
 
 class SymbolTable:
-    def __init__(self, parent=None):
-        self.parent = parent
-        self.table = {}
-        self.tableoffset = {}
-        self.offset = 0
-
-    def allocate(self, name, var_type):
-        self.offset += 4
-        self.tableoffset[name] = {"offset": self.offset, "type": var_type}
-        return self.offset
-
-    def get_offset(self, name):
-        if name in self.tableoffset:
-            return self.tableoffset[name]["offset"]
-        elif self.parent:
-            return self.parent.get_offset(name)
-        else:
-            raise Exception(f"Variable '{name}' not declared.")
+    # quadro cdecl de uma função: parâmetros acima de ebp, locais abaixo; globais em .data
+    def __init__(self, function=None):
+        self.function = function
+        self.nparams = len(function.children) - 1 if function else 0
+        self.return_label = f"fim_{function.value}" if function else None
+        self.tail_targets = set()
+
+    def tailLabel(self, target):
+        # "." não aparece em identificadores: fim_a.cauda_b_c e fim_a_b.cauda_c não colidem
+        return f"{self.return_label}.cauda_{target}"
+
+    def frame_size(self):
+        return 4 * (self.function.nlocals - 1 - self.nparams)
+
+    def address(self, identifier):
+        if identifier.depth == 1:
+            return f"[{GLOBAL_PREFIX}{identifier.value}]"
+
+        if identifier.slot <= self.nparams:
+            return f"[ebp+{4 + 4 * identifier.slot}]"
+
+        return f"[ebp-{4 * (identifier.slot - self.nparams)}]"
+
+
+# rótulos do Assembly ganham prefixo para não colidir com registradores e instruções
+GLOBAL_PREFIX = "g_"
+FUNCTION_PREFIX = "fn_"
+
+# eax recebe o resultado de cada expressão; os demais são de rascunho
+SCRATCH_REGISTERS = ["ecx", "edx", "ebx", "esi", "edi"]
+ALL_REGISTERS = ["eax"] + SCRATCH_REGISTERS
+BYTE_REGISTERS = {"eax": "al", "ebx": "bl", "ecx": "cl", "edx": "dl"}
+# a função chamada devolve ebx/esi/edi intactos (cdecl)
+CALLEE_SAVED = ["ebx", "esi", "edi"]
+CALLEE_SAVED_REGEX = re.compile(r"\b(ebx|bl|esi|edi)\b")
+# nós que chamam funções podem destruir qualquer registrador
+CALL_NEED = len(ALL_REGISTERS) + 1
+
+CONDITION_CODES = {"==": "e", "<": "l", ">": "g"}
+SWAPPED_OPERATORS = {"+": "+", "*": "*", "==": "==", "<": ">", ">": "<"}
+
+
+def setFlag(condition, target):
+    if target in BYTE_REGISTERS:
+        return [f"set{condition} {BYTE_REGISTERS[target]}", f"movzx {target}, {BYTE_REGISTERS[target]}"]
+
+    # esi/edi não têm byte baixo: usa uma palavra na pilha (push/pop não mexem nas flags)
+    return ["push 0", f"set{condition} byte [esp]", f"pop {target}"]
+
+
+def divisionMagic(divisor):
+    # multiplicador e deslocamento que trocam n / divisor (divisor >= 2) pela parte alta de
+    # um imul (Hacker's Delight, cap. 10); o multiplicador vem como inteiro sem sinal de 32 bits
+    two31 = 2 ** 31
+    anc = two31 - 1 - two31 % divisor
+    p = 31
+    q1, r1 = divmod(two31, anc)
+    q2, r2 = divmod(two31, divisor)
 
-    def declare(self, name, var_type):
-        if name in self.table:
-            raise Exception(f"Variable '{name}' already declared.")
-        
-        self.table[name] = (None, var_type)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
 
-    def set(self, name, value):
-        if name in self.table:
-            _, expected_type = self.table[name]
-            actual_type = value[1]
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= divisor:
+            q2, r2 = q2 + 1, r2 - divisor
 
-            if expected_type != actual_type:
-                raise TypeError(f"Type mismatch in assignment to '{name}'. Expected '{expected_type}', got '{actual_type}'.")
-            
-            self.table[name] = value
-        elif self.parent:
-            self.parent.set(name, value)
-        else:
-            raise Exception(f"Variable '{name}' not declared.")
+        delta = divisor - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            return q2 + 1, p - 32
 
-    def get(self, name):
-        if name in self.table:
-            entry = self.table[name]
 
-            if isinstance(entry, tuple) and len(entry) == 3 and entry[2].get("is_function"):
-                return entry
+class ProgramIO:
+    # E/S dos programas interpretados: os prints vão para um buffer escrito de uma vez (quando
+    # enche, antes de uma leitura que pode bloquear e no fim da execução) e a entrada é lida
+    # em blocos, guardada em linhas e convertida para inteiro só quando reader() pede.
+    # interativo mantém o comportamento de print()/input(): escreve na hora, lê uma linha por vez
+    BUFFER_SIZE = 1 << 16
+    CHUNK_SIZE = 1 << 16
 
-            value, _ = entry
+    def __init__(self, interactive=False):
+        self.interactive = interactive
+        self.output = []
+        self.buffered = 0
+        self.lines = deque()
+        self.partial = ""
+        self.eof = False
+        self.decoder = None
 
-            if value is None:
-                raise Exception(f"Variable '{name}' used before assignment.")
-            
-            return entry
-        elif self.parent:
-            return self.parent.get(name)    
+    def write(self, text):
+        if self.interactive:
+            sys.stdout.write(text + "\n")
+            return
+
+        self.output.append(text)
+        self.buffered += len(text) + 1
+
+        if self.buffered >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.output:
+            self.output.append("")
+            sys.stdout.write("\n".join(self.output))
+            self.output = []
+            self.buffered = 0
+
+        sys.stdout.flush()
+
+    def readLine(self):
+        if self.interactive:
+            sys.stdout.flush()
+            line = sys.stdin.readline()
+
+            if not line:
+                raise EOFError("EOF when reading a line")
+
+            return line[:-1] if line.endswith("\n") else line
+
+        while not self.lines:
+            if self.eof:
+                raise EOFError("EOF when reading a line")
+
+            # quem lê a saída pode estar esperando por ela para responder
+            self.flush()
+            chunk = self.readChunk()
+
+            if not chunk:
+                self.eof = True
+                if self.partial:
+                    self.lines.append(self.partial)
+                    self.partial = ""
+                continue
+
+            lines = (self.partial + chunk).replace("\r\n", "\n").split("\n")
+            self.partial = lines.pop()
+            self.lines.extend(lines)
+
+        return self.lines.popleft()
+
+    def readChunk(self):
+        # read1 devolve o que já chegou (até CHUNK_SIZE) em vez de esperar o bloco inteiro,
+        # então um pipe conversando com o programa não trava; StringIO (lote) não tem buffer
+        stream = getattr(sys.stdin, "buffer", None)
+
+        if stream is None or not hasattr(stream, "read1"):
+            return sys.stdin.read(self.CHUNK_SIZE)
+
+        if self.decoder is None:
+            self.decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")()
+
+        data = stream.read1(self.CHUNK_SIZE)
+        return self.decoder.decode(data, final=not data)
+
+    def readInt(self):
+        value = self.readLine()
+
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"Entrada inválida: {value}. Esperado um número inteiro.")
+
+
+# fora de Parser.run/runVM (ex.: bench.py chamando Evaluate) vale o comportamento interativo
+ProgramIO.current = ProgramIO(interactive=True)
+
+
+class StrBuilder:
+    # valor 'str' produzido por "++" nos interpretadores: acrescenta sem copiar o texto
+    # acumulado e só junta as partes quando ele é observado (print, comparação, chave de memo).
+    # Várias instâncias podem dividir a lista de partes; cada uma enxerga só as count primeiras.
+    __slots__ = ("parts", "count", "text")
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.count = len(parts)
+        self.text = None
+
+    @staticmethod
+    def concat(left, right):
+        if left.__class__ is StrBuilder:
+            parts = left.parts
+
+            # outra concatenação já estendeu a lista compartilhada: esta ramifica numa cópia
+            if left.count != len(parts):
+                parts = parts[:left.count]
         else:
-            raise Exception(f"Variable '{name}' not declared.")
+            parts = [str(left)]
+
+        parts.append(str(right))
+        return StrBuilder(parts)
+
+    def __str__(self):
+        if self.text is None:
+            self.text = "".join(self.parts if self.count == len(self.parts) else self.parts[:self.count])
+            # daqui em diante as próximas concatenações partem do texto já junto
+            self.parts = [self.text]
+            self.count = 1
+
+        return self.text
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    def __gt__(self, other):
+        return str(self) > str(other)
+
+    def __hash__(self):
+        return hash(str(self))
 
 
 class Node(ABC):
+    # sem __dict__ por instância: programas gerados grandes têm centenas de milhares de nós
+    __slots__ = ("value", "children", "id")
     current_id = 0
+    # folhas que o gerador usa direto como operando imediato/memória
+    is_operand = False
+    # comandos cujo Evaluate devolve (valor, tipo) quando um return é executado e None
+    # quando terminam normalmente
+    can_return = False
 
     @staticmethod
     def newId():
@@ -112,491 +678,2234 @@ class Node(ABC):
 
     def __init__(self, value, children: list):
         self.value = value
-        self.children = children
+        self.children = tuple(children)
         self.id = Node.newId()
 
+    def replaceChild(self, index, child):
+        children = list(self.children)
+        children[index] = child
+        self.children = tuple(children)
+
+    @abstractmethod
+    def Evaluate(self, frame):
+        pass
+
     @abstractmethod
-    def Evaluate(self, symbol_table):
+    def Generate(self, symbol_table, code):
         pass
 
     @abstractmethod
-    def Generate(self, symbol_table):
+    def Compile(self, compiler):
         pass
 
+    def registerNeed(self):
+        return CALL_NEED
+
+    def staticType(self):
+        # tipo do valor para o gerador; comandos não têm
+        return None
+
+    def touchesGlobalState(self):
+        # lê globais ou tem efeitos: não pode trocar de ordem com uma chamada
+        return any(child.touchesGlobalState() for child in self.children)
+
+    def operand(self, symbol_table):
+        return None
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        # caminho genérico: o resultado sai em eax e tudo que está ocupado é preservado
+        saved = [r for r in ALL_REGISTERS if r != target and r not in free]
+        code.append([f"push {r}" for r in saved])
+        self.Generate(symbol_table, code)
+
+        if target != "eax":
+            code.append(f"mov {target}, eax")
+
+        code.append([f"pop {r}" for r in reversed(saved)])
+
 
 class BinOp(Node):
+    # necessidade de registradores e acesso a globais, calculados uma vez por nó no gerador
+    __slots__ = ("need", "touches")
+
     def __init__(self, value, left, right):
-        super().__init__(value, [left, right])
+        super().__init__(value, (left, right))
+        self.need = None
+        self.touches = None
+
+
+    def Evaluate(self, frame):
+        # o TypeChecker troca cada BinOp pela versão do operador; fora de uma árvore
+        # checada vale a mesma semântica
+        return BINARY_SPECIALIZATIONS[self.value].Evaluate(self, frame)
+        
+    def registerNeed(self):
+        # Sethi-Ullman: um operando direito folha vira operando imediato/memória
+        if self.need is None:
+            if self.isStringOperation():
+                self.need = CALL_NEED
+            elif self.value in {"&&", "||"}:
+                # os dois lados saem no mesmo registrador, um depois do outro
+                self.need = max(self.children[0].registerNeed(), self.children[1].registerNeed())
+            else:
+                left = self.children[0].registerNeed()
+                right = 0 if self.children[1].is_operand else self.children[1].registerNeed()
+                self.need = max(left, right) if left != right else left + 1
+
+        return self.need
+
+    def staticType(self):
+        if self.value == "++":
+            return "str"
+
+        return "i32" if self.value in {"+", "-", "*", "/"} else "bool"
+
+    def isStringOperation(self):
+        # "++" e comparações de strings viram chamadas do runtime
+        return self.value == "++" or self.children[0].staticType() == "str"
+
+    def touchesGlobalState(self):
+        if self.touches is None:
+            self.touches = self.children[0].touchesGlobalState() or self.children[1].touchesGlobalState()
+
+        return self.touches
+
+    def canTrap(self):
+        # divisor 0 dá erro e -1 estoura o idiv com o menor i32
+        return self.value == "/" and not (isinstance(self.children[1], IntVal) and self.children[1].value not in {0, -1})
+
+    def Generate(self, symbol_table, code):
+        if self.isStringOperation():
+            self.generateStringCall(symbol_table, code)
+        else:
+            self.GenerateInto(symbol_table, code, "eax", SCRATCH_REGISTERS)
+
+    def generateStringCall(self, symbol_table, code):
+        routine = "rt_concat" if self.value == "++" else "rt_compara"
+        code.runtime.add(routine)
+
+        code.append("sub esp, 8")
+        for i, child in enumerate(self.children):
+            self.generateString(child, symbol_table, code)
+            code.append(f"mov [esp+{4 * i}], eax" if i else "mov [esp], eax")
+
+        code.append([f"call {routine}", "add esp, 8"])
+
+        if routine == "rt_compara":
+            code.append("cmp eax, 0")
+            code.append(setFlag(CONDITION_CODES[self.value], "eax"))
+
+    @staticmethod
+    def generateString(node, symbol_table, code):
+        # operandos de "++" que não são str viram texto como no interpretador
+        if isinstance(node, (IntVal, BoolVal)):
+            code.append(f"mov eax, {code.string(str(node.value))}")
+            return
+
+        node.Generate(symbol_table, code)
+        node_type = node.staticType()
+
+        if node_type == "i32":
+            code.runtime.add("rt_itos")
+            code.append(["push eax", "call rt_itos", "add esp, 4"])
+        elif node_type == "bool":
+            code.append([
+                "test eax, eax",
+                f"mov eax, {code.string('true')}",
+                f"mov ecx, {code.string('false')}",
+                "cmovz eax, ecx",
+            ])
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        if self.isStringOperation():
+            return Node.GenerateInto(self, symbol_table, code, target, free)
+
+        left, right = self.children
+        op = self.value
+
+        if op in {"&&", "||"}:
+            # bools são 0/1: o resultado é o último lado avaliado. test (e não cmp) para
+            # o branchOnFlag não descartar o valor que o rótulo ainda usa
+            end_label = f"curto_{self.id}"
+            left.GenerateInto(symbol_table, code, target, free)
+            code.append([f"test {target}, {target}", f"{'jz' if op == '&&' else 'jnz'} {end_label}"])
+            right.GenerateInto(symbol_table, code, target, free)
+            code.append(f"{end_label}:")
+            return
+
+        if op not in {"+", "-", "*", "/", "==", "<", ">"}:
+            raise Exception("Operador binário não implementado")
+
+        left_need = left.registerNeed()
+        right_need = right.registerNeed()
+
+        # com uma chamada de um lado e globais/efeitos do outro, vale a ordem da esquerda
+        # para a direita do interpretador
+        ordered = ((right_need >= CALL_NEED and left.touchesGlobalState())
+                   or (left_need >= CALL_NEED and right.touchesGlobalState()))
+
+        # com só o lado esquerdo folha (ou constante), troca os lados quando a operação permite
+        if (left.is_operand and (not right.is_operand or isinstance(left, IntVal))
+                and op in SWAPPED_OPERATORS and not ordered):
+            left, right = right, left
+            left_need, right_need = right_need, left_need
+            op = SWAPPED_OPERATORS[op]
+
+        if right.is_operand:
+            left.GenerateInto(symbol_table, code, target, free)
+            self.operate(code, op, target, right.operand(symbol_table), free)
+        elif (ordered and free) or (left_need >= right_need and right_need <= len(free)):
+            left.GenerateInto(symbol_table, code, target, free)
+            right.GenerateInto(symbol_table, code, free[0], free[1:])
+            self.operate(code, op, target, free[0], free[1:])
+        elif right_need > left_need and left_need <= len(free) and not ordered:
+            # o lado mais custoso primeiro, podendo usar o próprio target como rascunho
+            right.GenerateInto(symbol_table, code, free[0], [target] + free[1:])
+            left.GenerateInto(symbol_table, code, target, free[1:])
+            self.operate(code, op, target, free[0], free[1:])
+        elif ordered:
+            # sem registrador livre: o lado esquerdo espera na pilha
+            left.GenerateInto(symbol_table, code, target, free)
+            code.append(f"push {target}")
+            right.GenerateInto(symbol_table, code, target, free)
+            code.append(f"xchg {target}, dword [esp]")
+            self.operate(code, op, target, "dword [esp]", free)
+            code.append("lea esp, [esp+4]")
+        else:
+            # sem registradores suficientes: o lado direito espera na pilha
+            right.GenerateInto(symbol_table, code, target, free)
+            code.append(f"push {target}")
+            left.GenerateInto(symbol_table, code, target, free)
+            self.operate(code, op, target, "dword [esp]", free)
+            code.append("lea esp, [esp+4]")
+
+    def operate(self, code, op, target, operand, free):
+        constant = int(operand) if operand.lstrip("-").isdigit() and I32_MIN <= int(operand) <= I32_MAX else None
+
+        if op in {"+", "-"} and constant == 0:
+            return
+        elif op == "+":
+            code.append(f"add {target}, {operand}")
+        elif op == "-":
+            code.append(f"sub {target}, {operand}")
+        elif op == "*":
+            if constant is not None:
+                self.multiplyConstant(code, target, constant)
+            elif operand.lstrip("-").isdigit():
+                code.append(f"imul {target}, {target}, {operand}")
+            else:
+                code.append(f"imul {target}, {operand}")
+        elif op == "/" and constant is not None and constant not in {0, -1}:
+            # 0 e -1 continuam no idiv, que falha do mesmo jeito que antes
+            self.divideConstant(code, target, constant, free)
+        elif op == "/":
+            # idiv usa edx:eax; o divisor vai para a pilha e eax/edx ocupados são preservados
+            if operand != "dword [esp]":
+                code.append(f"push {operand}")
+
+            saved = [r for r in ("eax", "edx") if r != target and r != operand and r not in free]
+            code.append([f"push {r}" for r in saved])
+
+            if target != "eax":
+                code.append(f"mov eax, {target}")
+
+            code.append("cdq")
+            code.append(f"idiv dword [esp+{4 * len(saved)}]" if saved else "idiv dword [esp]")
+
+            if target != "eax":
+                code.append(f"mov {target}, eax")
+
+            code.append([f"pop {r}" for r in reversed(saved)])
+
+            if operand != "dword [esp]":
+                code.append("lea esp, [esp+4]")
+        elif op in CONDITION_CODES:
+            code.append(f"cmp {target}, {operand}")
+            code.append(setFlag(CONDITION_CODES[op], target))
+        else:
+            raise Exception("Operador binário não implementado")
 
+    @staticmethod
+    def multiplyConstant(code, target, constant):
+        # os 32 bits baixos do produto são os mesmos do imul
+        magnitude = abs(constant)
+        shift = (magnitude & -magnitude).bit_length() - 1 if magnitude else 0
+        odd = magnitude >> shift
+
+        if constant == 0:
+            code.append(f"xor {target}, {target}")
+        elif odd == 1:
+            if shift:
+                code.append(f"shl {target}, {shift}")
+            if constant < 0:
+                code.append(f"neg {target}")
+        elif odd in (3, 5, 9) and constant > 0:
+            code.append(f"lea {target}, [{target}+{target}*{odd - 1}]")
+            if shift:
+                code.append(f"shl {target}, {shift}")
+        else:
+            code.append(f"imul {target}, {target}, {constant}")
+
+    @staticmethod
+    def divideConstant(code, target, divisor, free):
+        # mesmo quociente do idiv (trunca em direção a zero); divisor fora de {0, -1}
+        magnitude = abs(divisor)
+        shift = magnitude.bit_length() - 1
+
+        if magnitude == 1:
+            pass
+        elif magnitude == 1 << shift:
+            # sar arredonda para baixo: negativos somam 2^k - 1 antes
+            if free:
+                scratch = free[0]
+                code.append(f"mov {scratch}, {target}")
+            else:
+                scratch = "dword [esp]"
+                code.append(f"push {target}")
+
+            if shift == 1:
+                code.append(f"shr {scratch}, 31")
+            else:
+                code.append([f"sar {scratch}, 31", f"shr {scratch}, {32 - shift}"])
+
+            code.append([f"add {target}, {scratch}", f"sar {target}, {shift}"])
+
+            if not free:
+                code.append("lea esp, [esp+4]")
+        else:
+            # parte alta de n * magic, corrigida pelo sinal de n; imul de um operando usa edx:eax
+            magic, shift = divisionMagic(magnitude)
+            saved = [r for r in ("eax", "edx") if r != target and r not in free]
+            code.append([f"push {r}" for r in saved])
+
+            # o dividendo ainda é lido depois do imul: fica numa cópia se o imul o destrói
+            spare = [r for r in free if r not in ("eax", "edx")]
+
+            if target not in ("eax", "edx"):
+                dividend = target
+            elif spare:
+                dividend = spare[0]
+                code.append(f"mov {dividend}, {target}")
+            else:
+                dividend = "dword [esp]"
+                code.append(f"push {target}")
+
+            signed_magic = magic - 2 ** 32 if magic >= 2 ** 31 else magic
+
+            if target == "eax":
+                code.append([f"mov edx, {signed_magic}", "imul edx"])
+            else:
+                code.append([f"mov eax, {signed_magic}", f"imul {target}"])
+
+            if magic >= 2 ** 31:
+                code.append(f"add edx, {dividend}")
+            if shift:
+                code.append(f"sar edx, {shift}")
+
+            code.append([f"mov eax, {dividend}", "shr eax, 31", "add edx, eax"])
 
-    def Evaluate(self, symbol_table):
-        left_value, left_type = self.children[0].Evaluate(symbol_table)
-        right_value, right_type = self.children[1].Evaluate(symbol_table)
+            if target != "edx":
+                code.append(f"mov {target}, edx")
+            if dividend == "dword [esp]":
+                code.append("lea esp, [esp+4]")
+
+            code.append([f"pop {r}" for r in reversed(saved)])
+
+        if divisor < 0:
+            code.append(f"neg {target}")
+
+    def Compile(self, compiler):
+        if self.value in {"&&", "||"}:
+            return self.compileLogical(compiler)
+
+        left, right = self.children
+
+        if isinstance(left, IntVal) and not isinstance(right, IntVal) and self.value in COMMUTATIVE_OPERATORS:
+            right_type = right.Compile(compiler)
+
+            if right_type != "i32":
+                raise TypeError(f"Operação aritmética requer operandos 'i32', mas recebeu 'i32' e '{right_type}'"
+                                if self.value != "==" else
+                                f"Comparação requer operandos do mesmo tipo, mas recebeu 'i32' e '{right_type}'")
+
+            compiler.emit(CONSTANT_OPCODES[self.value], compiler.constant(left.value))
+            return "bool" if self.value == "==" else "i32"
+
+        left_type = self.children[0].Compile(compiler)
+
+        if (left_type == "i32" and self.value in CONSTANT_OPCODES and isinstance(self.children[1], IntVal)
+                and (self.value != "/" or self.children[1].value != 0)):
+            compiler.emit(CONSTANT_OPCODES[self.value], compiler.constant(self.children[1].value))
+            return "bool" if self.value in {"==", ">", "<"} else "i32"
+
+        if self.value == "++" and left_type == "bool":
+            compiler.emit(Op.BOOLSTR)
+
+        right_type = self.children[1].Compile(compiler)
 
         if self.value in {"+", "-", "*", "/"}:
             if left_type != "i32" or right_type != "i32":
                 raise TypeError(f"Operação aritmética requer operandos 'i32', mas recebeu '{left_type}' e '{right_type}'")
-            
-            if self.value == "+":
-                return (left_value + right_value, "i32")
-            elif self.value == "-":
-                return (left_value - right_value, "i32")
-            elif self.value == "*":
-                return (left_value * right_value, "i32")
-            elif self.value == "/":
-                if right_value == 0:
-                    raise ZeroDivisionError("Erro: divisão por zero.")
-                
-                return (left_value // right_value, "i32")
-        
-        elif self.value in {"&&", "||"}:
-            if left_type != "bool" or right_type != "bool":
-                raise TypeError(f"Operação lógica requer operandos 'bool', mas recebeu '{left_type}' e '{right_type}'")
-            
-            if self.value == "&&":
-                return (1 if left_value and right_value else 0, "bool")
-            elif self.value == "||":
-                return (1 if left_value or right_value else 0, "bool")
-        
+
+            compiler.emit(BINARY_OPCODES[self.value])
+            return "i32"
+
         elif self.value in {"==", ">", "<"}:
             if left_type != right_type:
                 raise TypeError(f"Comparação requer operandos do mesmo tipo, mas recebeu '{left_type}' e '{right_type}'")
-            
-            if self.value == "==":
-                return (1 if left_value == right_value else 0, "bool")
-            elif self.value == ">":
-                return (1 if left_value > right_value else 0, "bool")
-            elif self.value == "<":
-                return (1 if left_value < right_value else 0, "bool")
-        
+
+            compiler.emit(BINARY_OPCODES[self.value])
+            return "bool"
+
         elif self.value == "++":
-            if left_type == "bool" and right_type == "bool":
-                return (str("true" if left_value else "false") + str("true" if right_value else "false"), "str")
-            elif left_type == "bool" and right_type != "bool":
-                return (str("true" if left_value else "false") + str(right_value), "str")
-            elif right_type == "bool" and left_type != "bool":
-                return (str(left_value) + str("true" if right_value else "false"), "str")
-            else:
-                return (str(left_value) + str(right_value), "str")
+            if right_type == "bool":
+                compiler.emit(Op.BOOLSTR)
+
+            compiler.emit(Op.CONCAT)
+            return "str"
 
         else:
             raise ValueError(f"Operador binário desconhecido: {self.value}")
-        
-    def Generate(self, symbol_table):
-        code = []
-        code += self.children[1].Generate(symbol_table)  # right
-        code.append("push eax")
-        code += self.children[0].Generate(symbol_table)  # left
-        code.append("pop ecx")
-
-        if self.value == "+":
-            code.append("add eax, ecx")
-        elif self.value == "-":
-            code.append("sub eax, ecx")
-        elif self.value == "*":
-            code.append("imul ecx")
-        elif self.value == "/":
-            code.append("mov edx, 0")
-            code.append("idiv ecx")
-        elif self.value in ["==", "<", ">"]:
-            code.append("cmp eax, ecx")
-            code.append("mov eax, 0")
-            code.append("mov ecx, 1")
-
-            if self.value == "==":
-                code.append("cmove eax, ecx")
-            elif self.value == "<":
-                code.append("cmovl eax, ecx")
-            elif self.value == ">":
-                code.append("cmovg eax, ecx")
-        elif self.value == "&&":
-            code.append("test eax, eax")
-            code.append("je false_and")
-            code.append("test ecx, ecx")
-            code.append("je false_and")
-            code.append("mov eax, 1")
-            code.append("jmp end_and")
-            code.append("false_and:")
-            code.append("mov eax, 0")
-            code.append("end_and:")
-        elif self.value == "||":
-            code.append("test eax, eax")
-            code.append("jne true_or")
-            code.append("test ecx, ecx")
-            code.append("jne true_or")
-            code.append("mov eax, 0")
-            code.append("jmp end_or")
-            code.append("true_or:")
-            code.append("mov eax, 1")
-            code.append("end_or:")
-        else:
-            raise Exception("Operador binário não implementado")
 
-        return code
+    def compileLogical(self, compiler):
+        # o valor decisivo fica na pilha; senão é descartado e o lado direito decide
+        left_type = self.children[0].Compile(compiler)
+        jump = compiler.emitJump(Op.JUMP_IF_FALSE_OR_POP if self.value == "&&" else Op.JUMP_IF_TRUE_OR_POP)
+        right_type = self.children[1].Compile(compiler)
+
+        if left_type != "bool" or right_type != "bool":
+            raise TypeError(f"Operação lógica requer operandos 'bool', mas recebeu '{left_type}' e '{right_type}'")
+
+        compiler.patch(jump)
+        return "bool"
 
 
 class UnOp(Node):
+    __slots__ = ()
+
     def __init__(self, value, child):
-        super().__init__(value, [child])
+        super().__init__(value, (child,))
+
+
+    def Evaluate(self, frame):
+        return UNARY_SPECIALIZATIONS[self.value].Evaluate(self, frame)
+    
+    def registerNeed(self):
+        return self.children[0].registerNeed()
 
+    def staticType(self):
+        return "bool" if self.value == "!" else "i32"
+
+    def Generate(self, symbol_table, code):
+        self.GenerateInto(symbol_table, code, "eax", SCRATCH_REGISTERS)
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        self.children[0].GenerateInto(symbol_table, code, target, free)
+
+        if self.value == "-":
+            code.append(f"neg {target}")
+        elif self.value == "!":
+            code.append(f"xor {target}, 1")
 
-    def Evaluate(self, symbol_table):
-        value, val_type = self.children[0].Evaluate(symbol_table)
+    def Compile(self, compiler):
+        val_type = self.children[0].Compile(compiler)
 
         if self.value in {"+", "-"}:
             if val_type != "i32":
                 raise TypeError(f"Operador unário '{self.value}' requer tipo 'i32', mas recebeu '{val_type}'")
-            
-            return ((+value if self.value == "+" else -value), "i32")
+
+            if self.value == "-":
+                compiler.emit(Op.NEG)
+
+            return "i32"
 
         elif self.value == "!":
             if val_type != "bool":
                 raise TypeError(f"Operador unário '!' requer tipo 'bool', mas recebeu '{val_type}'")
-            
-            return (1 if not value else 0, "bool")
-        
+
+            compiler.emit(Op.NOT)
+            return "bool"
+
         else:
             raise ValueError(f"Operador unário desconhecido: {self.value}")
-    
-    def Generate(self, symbol_table):
-        code = self.children[0].Generate(symbol_table)
 
-        if self.value == "-":
-            code.append("neg eax")
-        elif self.value == "!":
-            code.append("cmp eax, 0")
-            code.append("mov eax, 0")
-            code.append("mov ecx, 1")
-            code.append("cmove eax, ecx")
 
-        return code
+# versões criadas pelo TypeChecker: com os tipos já verificados, devolvem o valor cru,
+# sem etiqueta de tipo (i32 é int, bool é True/False, str é str ou StrBuilder)
+class IntAdd(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) + right.Evaluate(frame)
+
+
+class IntSub(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) - right.Evaluate(frame)
+
+
+class IntMul(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) * right.Evaluate(frame)
+
+
+class IntDiv(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        dividend = left.Evaluate(frame)
+        divisor = right.Evaluate(frame)
+
+        if divisor == 0:
+            raise ZeroDivisionError("Erro: divisão por zero.")
+
+        return dividend // divisor
+
+
+class Equal(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) == right.Evaluate(frame)
+
+
+class Less(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) < right.Evaluate(frame)
+
+
+class Greater(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) > right.Evaluate(frame)
+
+
+class LogicalAnd(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        # and/or do Python já param no lado que decide
+        left, right = self.children
+        return left.Evaluate(frame) and right.Evaluate(frame)
+
+
+class LogicalOr(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        return left.Evaluate(frame) or right.Evaluate(frame)
+
 
+class Concat(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        left, right = self.children
+        left_value = left.Evaluate(frame)
+        right_value = right.Evaluate(frame)
+
+        if left_value.__class__ is bool:
+            left_value = "true" if left_value else "false"
+
+        if right_value.__class__ is bool:
+            right_value = "true" if right_value else "false"
+
+        return StrBuilder.concat(left_value, right_value)
+
+
+class IntPlus(UnOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        return self.children[0].Evaluate(frame)
+
+
+class IntNeg(UnOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        return -self.children[0].Evaluate(frame)
+
+
+class BoolNot(UnOp):
+    __slots__ = ()
+
+    def Evaluate(self, frame):
+        return not self.children[0].Evaluate(frame)
+
+
+BINARY_SPECIALIZATIONS = {
+    "+": IntAdd, "-": IntSub, "*": IntMul, "/": IntDiv,
+    "==": Equal, "<": Less, ">": Greater,
+    "&&": LogicalAnd, "||": LogicalOr, "++": Concat,
+}
+
+UNARY_SPECIALIZATIONS = {"+": IntPlus, "-": IntNeg, "!": BoolNot}
 
 
 class IntVal(Node):
+    __slots__ = ()
+    is_operand = True
+
     def __init__(self, value):
         super().__init__(value, [])
 
 
-    def Evaluate(self, symbol_table):
-         return (self.value, "i32")
+    def Evaluate(self, frame):
+         return self.value
     
-    def Generate(self, symbol_table):
-        return ["mov eax, " + str(self.value)]
+    def registerNeed(self):
+        return 1
+
+    def staticType(self):
+        return "i32"
+
+    def operand(self, symbol_table):
+        return str(self.value)
+
+    def Generate(self, symbol_table, code):
+        code.append("mov eax, " + str(self.value))
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        code.append(f"mov {target}, {self.value}")
+
+    def Compile(self, compiler):
+        compiler.emit(Op.CONST, compiler.constant(self.value))
+        return "i32"
     
 
 class BoolVal(Node):
+    __slots__ = ()
+    is_operand = True
+
     def __init__(self, value):
         super().__init__(value, [])
 
-    def Evaluate(self, symbol_table):
-        return (1 if self.value == "true" else 0, "bool")
+    def Evaluate(self, frame):
+        return self.value == "true"
     
-    def Generate(self, symbol_table):
+    def registerNeed(self):
+        return 1
+
+    def staticType(self):
+        return "bool"
+
+    def operand(self, symbol_table):
+        return "1" if self.value == "true" else "0"
+
+    def Generate(self, symbol_table, code):
         val = "1" if self.value == "true" else "0"
-        return [f"mov eax, {val}"]
+        code.append(f"mov eax, {val}")
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        code.append(f"mov {target}, {self.operand(symbol_table)}")
+
+    def Compile(self, compiler):
+        compiler.emit(Op.CONST, compiler.constant(self.value == "true"))
+        return "bool"
 
 
 class StrVal(Node):
+    __slots__ = ()
     def __init__(self, value):
         super().__init__(value, [])
 
-    def Evaluate(self, symbol_table):
-        return (self.value, "str")
+    def Evaluate(self, frame):
+        return self.value
+
+    def registerNeed(self):
+        return 1
+
+    def staticType(self):
+        return "str"
     
-    def Generate(self, symbol_table):
-        raise NotImplementedError("Strings ainda não são suportadas em código Assembly.")
+    def Generate(self, symbol_table, code):
+        code.append(f"mov eax, {code.string(self.value)}")
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        code.append(f"mov {target}, {code.string(self.value)}")
+
+    def Compile(self, compiler):
+        compiler.emit(Op.CONST, compiler.constant(self.value))
+        return "str"
 
 
 class Identifier(Node):
+    # preenchidos pelo Resolver
+    __slots__ = ("depth", "slot", "var_type")
+    is_operand = True
+
     def __init__(self, value):
         super().__init__(value, [])
 
 
-    def Evaluate(self, symbol_table):
-        return symbol_table.get(self.value)
+    def Evaluate(self, frame):
+        # depth 0: variável local da ativação; depth 1: global (frame[0])
+        value = frame[self.slot] if self.depth == 0 else frame[0][self.slot]
+
+        if value is None:
+            raise Exception(f"Variable '{self.value}' used before assignment.")
+
+        return value
     
-    def Generate(self, symbol_table):
-        offset = symbol_table.get_offset(self.value)
-        return [f"mov eax, [ebp-{offset}]"]
+    def registerNeed(self):
+        return 1
+
+    def touchesGlobalState(self):
+        return self.depth == 1
+
+    def staticType(self):
+        return self.var_type
+
+    def operand(self, symbol_table):
+        return f"dword {symbol_table.address(self)}"
+
+    def Generate(self, symbol_table, code):
+        code.append(f"mov eax, {symbol_table.address(self)}")
+
+    def GenerateInto(self, symbol_table, code, target, free):
+        code.append(f"mov {target}, {self.operand(symbol_table)}")
+
+    def Compile(self, compiler):
+        compiler.emit(Op.GLOAD if self.depth else Op.LOAD, self.slot)
+        return self.var_type
     
 
 class VarDeC(Node):
+    __slots__ = ("var_type",)
+
     def __init__(self, identifier, type, expression=None):
-        super().__init__("=", [identifier, type] + ([expression] if expression else []))
+        super().__init__("=", (identifier, expression) if expression else (identifier,))
+        self.var_type = type
 
 
-    def Evaluate(self, symbol_table):
-        symbol_table.declare(self.children[0].value, self.children[1])
+    def Evaluate(self, frame):
+        identifier = self.children[0]
+        values = frame if identifier.depth == 0 else frame[0]
 
-        if len(self.children) == 3:
-            if self.children[1] != self.children[2].Evaluate(symbol_table)[1]:
-                raise TypeError(f"Tipo de variável '{self.children[0].value}' não corresponde ao tipo da expressão.")
-            
-            value, type = self.children[2].Evaluate(symbol_table)
-            symbol_table.set(self.children[0].value, (value, type))
-            return (value, type)
-        
-        return (None, None)
+        # redeclarar (ex.: a cada iteração de um while) sem valor volta ao estado "não atribuído"
+        values[identifier.slot] = self.children[1].Evaluate(frame) if len(self.children) == 2 else None
     
-    def Generate(self, symbol_table):
-        identifier = self.children[0].value
-        type_ = self.children[1]
-        offset = symbol_table.allocate(identifier, type_)
+    def Generate(self, symbol_table, code):
+        identifier = self.children[0]
 
-        code = [f"sub esp, 4 ; reserva espaço para {identifier}"]
+        # str sem valor começa vazia: o descritor nunca é um ponteiro nulo
+        initial = code.string("") if self.var_type == "str" and len(self.children) == 1 else None
 
-        if len(self.children) == 3:
-            expr_code = self.children[2].Generate(symbol_table)
-            code += expr_code
-            code.append(f"mov [ebp-{offset}], eax")
+        # locais já têm espaço no quadro reservado pelo prólogo da função
+        if identifier.depth == 1:
+            code.data.append(f"{GLOBAL_PREFIX}{identifier.value} dd {initial or 0}")
+        elif initial:
+            code.append(f"mov dword {symbol_table.address(identifier)}, {initial}")
+
+        if len(self.children) == 2:
+            self.children[1].Generate(symbol_table, code)
+            code.append(f"mov {symbol_table.address(identifier)}, eax")
+
+    def Compile(self, compiler):
+        identifier = self.children[0]
 
-        return code
+        if len(self.children) == 2:
+            expr_type = self.children[1].Compile(compiler)
+
+            if self.var_type != expr_type:
+                raise TypeError(f"Tipo de variável '{identifier.value}' não corresponde ao tipo da expressão.")
+
+            compiler.emit(Op.GSTORE if identifier.depth else Op.STORE, identifier.slot)
+        else:
+            compiler.emit(Op.GCLEAR if identifier.depth else Op.CLEAR, identifier.slot)
 
 
 class Assignment(Node):
+    __slots__ = ()
     def __init__(self, identifier, expression):
         super().__init__("=", [identifier, expression])
 
 
-    def Evaluate(self, symbol_table):
-        value, type = self.children[1].Evaluate(symbol_table)
-        symbol_table.set(self.children[0].value, (value, type))
-        return (value, type)
+    def Evaluate(self, frame):
+        identifier = self.children[0]
+
+        if identifier.depth == 0:
+            frame[identifier.slot] = self.children[1].Evaluate(frame)
+        else:
+            frame[0][identifier.slot] = self.children[1].Evaluate(frame)
     
-    def Generate(self, symbol_table):
-        code = self.children[1].Generate(symbol_table)
-        offset = symbol_table.get_offset(self.children[0].value)
-        code.append(f"mov [ebp-{offset}], eax")
-        return code
+    def Generate(self, symbol_table, code):
+        self.children[1].Generate(symbol_table, code)
+        code.append(f"mov {symbol_table.address(self.children[0])}, eax")
+
+    def Compile(self, compiler):
+        identifier = self.children[0]
+        actual_type = self.children[1].Compile(compiler)
+
+        if identifier.var_type != actual_type:
+            raise TypeError(f"Type mismatch in assignment to '{identifier.value}'. Expected '{identifier.var_type}', got '{actual_type}'.")
+
+        compiler.emit(Op.GSTORE if identifier.depth else Op.STORE, identifier.slot)
 
 
 class Print(Node):
+    __slots__ = ()
     def __init__(self, expression):
         super().__init__("print", [expression])
 
 
-    def Evaluate(self, symbol_table):
-        value = self.children[0].Evaluate(symbol_table)
-        if value[1] == "bool":
-            print("true" if value[0] else "false")
+    def Evaluate(self, frame):
+        value = self.children[0].Evaluate(frame)
+
+        if value.__class__ is bool:
+            ProgramIO.current.write("true" if value else "false")
         else:
-            print(value[0])
-        return (value, None)
+            ProgramIO.current.write(str(value))
     
-    def Generate(self, symbol_table):
-        code = self.children[0].Generate(symbol_table)
+    def Generate(self, symbol_table, code):
+        self.children[0].Generate(symbol_table, code)
+
+        if self.children[0].staticType() == "str":
+            code.append(["push dword [eax]", "push dword [eax+4]", "push format_str", "call printf", "add esp, 12"])
+            return
+
         code.append("push eax")
         code.append("push format_out")
         code.append("call printf")
         code.append("add esp, 8")
-        return code
+
+    def Compile(self, compiler):
+        value_type = self.children[0].Compile(compiler)
+        compiler.emit(Op.PRINT_BOOL if value_type == "bool" else Op.PRINT)
     
     
 class If(Node):
+    __slots__ = ()
+    can_return = True
+
     def __init__(self, condition, then_branch, else_branch=None):
         super().__init__("if", [condition, then_branch] + ([else_branch] if else_branch else []))
 
-    def Evaluate(self, symbol_table):
-        condition_value, condition_type = self.children[0].Evaluate(symbol_table)
+    def Evaluate(self, frame):
+        if self.children[0].Evaluate(frame):
+            return self.children[1].Evaluate(frame)
+        elif len(self.children) > 2:
+            return self.children[2].Evaluate(frame)
         
-        if condition_type != "bool":
-            raise TypeError(f"Condição do 'if' deve ser do tipo 'bool', mas recebeu '{condition_type}'")
-        
-        if condition_value:
-            return self.children[1].Evaluate(symbol_table)
-        elif len(self.children) > 2:
-            return self.children[2].Evaluate(symbol_table)
-        
-    def Generate(self, symbol_table):
+    def Generate(self, symbol_table, code):
         if_id = self.id
         else_label = f"else_{if_id}"
         end_label = f"endif_{if_id}"
 
-        code = self.children[0].Generate(symbol_table)
-        code += ["cmp eax, 0"]
+        self.children[0].Generate(symbol_table, code)
+        code.append("cmp eax, 0")
 
         if len(self.children) == 3:
             code.append(f"je {else_label}")
-            code += self.children[1].Generate(symbol_table)
+            self.children[1].Generate(symbol_table, code)
             code.append(f"jmp {end_label}")
             code.append(f"{else_label}:")
-            code += self.children[2].Generate(symbol_table)
+            self.children[2].Generate(symbol_table, code)
             code.append(f"{end_label}:")
         else:
             code.append(f"je {end_label}")
-            code += self.children[1].Generate(symbol_table)
+            self.children[1].Generate(symbol_table, code)
             code.append(f"{end_label}:")
 
-        return code
+    def Compile(self, compiler):
+        condition_type = self.children[0].Compile(compiler)
+
+        if condition_type != "bool":
+            raise TypeError(f"Condição do 'if' deve ser do tipo 'bool', mas recebeu '{condition_type}'")
+
+        else_jump = compiler.emitJumpIfFalse()
+        self.children[1].Compile(compiler)
+
+        if len(self.children) > 2:
+            end_jump = compiler.emitJump(Op.JUMP)
+            compiler.patch(else_jump)
+            self.children[2].Compile(compiler)
+            compiler.patch(end_jump)
+        else:
+            compiler.patch(else_jump)
     
 
 class While(Node):
+    __slots__ = ()
+    can_return = True
+
     def __init__(self, condition, block):
         super().__init__("while", [condition, block])
 
-    def Evaluate(self, symbol_table):
-        condition_value, condition_type = self.children[0].Evaluate(symbol_table)
+    def Evaluate(self, frame):
+        condition, body = self.children
+
+        while condition.Evaluate(frame):
+            result = body.Evaluate(frame)
+
+            if result is not None:
+                return result
+    
+    def Generate(self, symbol_table, code):
+        loop_id = self.id
+        start_label = f"loop_{loop_id}"
+        end_label = f"exit_{loop_id}"
+
+        code.append(f"{start_label}:")
+        self.children[0].Generate(symbol_table, code)
+        code.append(["cmp eax, 0", f"je {end_label}"])
+        self.children[1].Generate(symbol_table, code)
+        code.append(f"jmp {start_label}")
+        code.append(f"{end_label}:")
+
+    def Compile(self, compiler):
+        start = compiler.position()
+        condition_type = self.children[0].Compile(compiler)
 
         if condition_type != "bool":
             raise TypeError(f"Condição do 'while' deve ser do tipo 'bool', mas recebeu '{condition_type}'")
+
+        exit_jump = compiler.emitJumpIfFalse()
+        self.children[1].Compile(compiler)
+        compiler.emit(Op.JUMP, start)
+        compiler.patch(exit_jump)
+
+
+class Block(Node):
+    # global_names e dead_nodes só são preenchidos na raiz do programa
+    __slots__ = ("global_names", "dead_nodes")
+    can_return = True
+
+    def __init__(self, statements):
+        super().__init__("block", statements)
+
+    def Evaluate(self, frame):
+        # os escopos já foram resolvidos em slots do frame pelo Resolver
+        for stmt in self.children:
+            result = stmt.Evaluate(frame)
+
+            # o resultado de chamadas e atribuições usadas como comando é descartado
+            if result is not None and stmt.can_return:
+                return result
+
+    def Generate(self, symbol_table, code):
+        for stmt in self.children:
+            stmt.Generate(symbol_table, code)
+
+    def Compile(self, compiler):
+        for stmt in self.children:
+            # chamadas usadas como comando deixam o retorno na pilha
+            if stmt.Compile(compiler) is not None:
+                compiler.emit(Op.POP)
+
+
+class Read(Node):
+    __slots__ = ()
+    def __init__(self):
+        super().__init__("read", [])
+
+    def Evaluate(self, frame):
+        return ProgramIO.current.readInt()
+
+    def touchesGlobalState(self):
+        return True
+
+    def staticType(self):
+        return "i32"
         
-        result = None
+    def Generate(self, symbol_table, code):
+        code.append([
+            "push scan_int",
+            "push format_in",
+            "call scanf",
+            "add esp, 8",
+            "mov eax, [scan_int]"
+        ])
+
+    def Compile(self, compiler):
+        compiler.emit(Op.READ)
+        return "i32"
+
+
+class FuncDec(Node):
+    # nlocals/slot_names vêm do Resolver, pure do PurityAnalyzer
+    __slots__ = ("return_type", "nlocals", "slot_names", "memo", "pure")
+
+    def __init__(self, name, parameters, return_type, body):
+        super().__init__(name, parameters + [body])
+        self.return_type = return_type
+        # cache de resultados; só existe para funções puras com a memoização ligada
+        self.memo = None
+
+    def Evaluate(self, frame):
+        # as chamadas são ligadas à declaração pelo Resolver
+        return None
+
+    def Generate(self, symbol_table, code):
+        symbol_table = SymbolTable(self)
+
+        code.append(f"{FUNCTION_PREFIX}{self.value}:")
+        code.append(["push ebp", "mov ebp, esp"])
+
+        if symbol_table.frame_size():
+            code.append(f"sub esp, {symbol_table.frame_size()}")
+
+        # o corpo sai numa lista própria: os pushes dependem dele e inseri-los no meio
+        # do programa custaria uma cópia de todas as instruções já emitidas
+        program = code.instructions
+        code.instructions = []
+        self.children[-1].Generate(symbol_table, code)
+        body, code.instructions = code.instructions, program
+
+        # só salva os registradores preservados que o corpo realmente usa
+        used = set(CALLEE_SAVED_REGEX.findall(" ".join(body)))
+        saved = [r for r in CALLEE_SAVED if r in used or (r == "ebx" and "bl" in used)]
+        code.append([f"push {r}" for r in saved])
+        code.append(body)
+
+        if self.return_type != "void":
+            # terminar sem return é erro, como no interpretador
+            message = (f"Tipo de retorno da função '{self.value}' incompatível. "
+                       f"Esperado '{self.return_type}', recebido 'void'.")
+            code.data.append(f'erro_{self.value} db "{message}", 10, 0')
+            code.append([f"push erro_{self.value}", "call printf", "push 1", "call exit"])
+
+        # saídas de cauda: desfazem o quadro como o epílogo, mas saltam para o chamado,
+        # que herda o endereço de retorno
+        for target in [None] + sorted(symbol_table.tail_targets):
+            code.append(f"{symbol_table.tailLabel(target)}:" if target else f"{symbol_table.return_label}:")
+
+            if saved:
+                code.append(f"lea esp, [ebp-{symbol_table.frame_size() + 4 * len(saved)}]")
+                code.append([f"pop {r}" for r in reversed(saved)])
+
+            code.append(["mov esp, ebp", "pop ebp", f"jmp {FUNCTION_PREFIX}{target}" if target else "ret"])
+
+    def Compile(self, compiler):
+        compiler.compileFunction(self)
+
+
+class FuncCall(Node):
+    # declaração ligada pelo Resolver
+    __slots__ = ("func",)
+
+    def __init__(self, name, arguments):
+        super().__init__(name, arguments)
+
+    def activate(self, frame):
+        func_node = self.func
+
+        # 1) prepara a ativação: posição 0 aponta para os globais
+        activation = [None] * func_node.nlocals
+        activation[0] = frame[0]
+
+        # 2) inicializa parâmetros (quantidade checada pelo Resolver, tipos pelo TypeChecker)
+        for param_node, arg_node in zip(func_node.children[:-1], self.children):
+            activation[param_node.children[0].slot] = arg_node.Evaluate(frame)
+
+        return activation
+
+    def Evaluate(self, frame):
+        func_node = self.func
+        activation = self.activate(frame)
+        memo = func_node.memo
+
+        if memo is not None:
+            key = tuple(activation[1:len(self.children) + 1])
+            result = memo.lookup(key)
+
+            if result is not MEMO_MISS:
+                return result
+
+        # 3) executa corpo; chamadas em posição de cauda voltam aqui em vez de empilhar
+        result = func_node.children[-1].Evaluate(activation)
+
+        while result.__class__ is TailCall:
+            func_node = result.func
+            result = result.run()
+
+        # 4) terminar sem return só vale para void; o tipo dos returns já foi checado
+        if result is None:
+            if func_node.return_type != "void":
+                raise TypeError(
+                    f"Tipo de retorno da função '{func_node.value}' incompatível. "
+                    f"Esperado '{func_node.return_type}', recebido 'void'."
+                )
+        elif result is VOID_RESULT:
+            result = None
+
+        if memo is not None:
+            memo.store(key, result)
+
+        return result
+
+    def touchesGlobalState(self):
+        return True
+
+    def staticType(self):
+        return self.func.return_type
+
+    def Generate(self, symbol_table, code):
+        nargs = len(self.children)
+
+        # cdecl: o 1º argumento fica em [esp] na chamada, mas a avaliação segue da esquerda para a direita
+        if nargs:
+            code.append(f"sub esp, {4 * nargs}")
+
+        for i, arg_node in enumerate(self.children):
+            arg_node.Generate(symbol_table, code)
+            code.append(f"mov [esp+{4 * i}], eax" if i else "mov [esp], eax")
+
+        code.append(f"call {FUNCTION_PREFIX}{self.value}")
+
+        if nargs:
+            code.append(f"add esp, {4 * nargs}")
+
+    def Compile(self, compiler):
+        func_node = self.func
+        params = func_node.children[:-1]
+
+        for param_node, arg_node in zip(params, self.children):
+            pname = param_node.children[0].value
+            ptype = param_node.var_type
+            t = arg_node.Compile(compiler)
+            if t != ptype:
+                raise TypeError(f"Tipo do argumento '{pname}' incompatível. Esperado '{ptype}', recebido '{t}'.")
+
+        compiler.emit(Op.CALL, compiler.function_index[func_node.value])
+        return func_node.return_type
+
+
+class TailCall:
+    # "return f(...)": a ativação de f substitui a atual no laço de FuncCall.Evaluate
+    __slots__ = ("call", "func", "activation")
+
+    def __init__(self, call, activation):
+        self.call = call
+        self.func = call.func
+        self.activation = activation
+
+    def run(self):
+        return self.func.children[-1].Evaluate(self.activation)
+
+
+# "return" de uma chamada void: não pode ser None, que é como um comando termina normalmente
+VOID_RESULT = object()
+
+
+class Return(Node):
+    __slots__ = ("tail_call",)
+    can_return = True
+
+    def __init__(self, expression):
+        super().__init__("return", [expression])
+        # marcado pelo Resolver quando a expressão é uma chamada com o mesmo tipo de retorno
+        self.tail_call = False
+
+    def Evaluate(self, frame):
+        if self.tail_call:
+            call = self.children[0]
+            return TailCall(call, call.activate(frame))
+
+        # o valor sobe por Block/If/While até FuncCall; None ali significa "terminou sem return"
+        value = self.children[0].Evaluate(frame)
+        return VOID_RESULT if value is None else value
+
+    def Generate(self, symbol_table, code):
+        call = self.children[0]
+
+        # o quadro atual é reaproveitado se os argumentos do chamado cabem nos parâmetros recebidos
+        if self.tail_call and len(call.children) <= symbol_table.nparams:
+            nargs = len(call.children)
+
+            # avalia todos antes de sobrescrever: os argumentos podem ler os parâmetros atuais
+            code.append(f"sub esp, {4 * nargs}")
+            for i, arg_node in enumerate(call.children):
+                arg_node.Generate(symbol_table, code)
+                code.append(f"mov [esp+{4 * i}], eax" if i else "mov [esp], eax")
+
+            for i in range(nargs):
+                code.append(f"mov eax, [esp+{4 * i}]" if i else "mov eax, [esp]")
+                code.append(f"mov [ebp+{8 + 4 * i}], eax")
+
+            symbol_table.tail_targets.add(call.value)
+            code.append(f"jmp {symbol_table.tailLabel(call.value)}")
+            return
+
+        self.children[0].Generate(symbol_table, code)
+        code.append(f"jmp {symbol_table.return_label}")
+
+    def Compile(self, compiler):
+        typ = self.children[0].Compile(compiler)
+        func_node = compiler.current_function
+
+        if typ != func_node.return_type:
+            raise TypeError(
+                f"Tipo de retorno da função '{func_node.value}' incompatível. "
+                f"Esperado '{func_node.return_type}', recebido '{typ}'."
+            )
+
+        compiler.emit(Op.RETURN)
+
+
+class NoOp(Node):
+    __slots__ = ()
+    def __init__(self):
+        super().__init__(None, [])
+
+
+    def Evaluate(self, frame):
+        return None
+    
+    def Generate(self, symbol_table, code):
+        pass
+
+    def Compile(self, compiler):
+        pass
+
+
+class Resolver:
+    # liga cada Identifier a (depth, slot): depth 0 é a ativação da função,
+    # depth 1 são os globais, alcançados por frame[0] em qualquer ativação
+    # o escopo é léxico: uma função só enxerga os próprios locais e os globais,
+    # nunca os locais de quem a chamou (antes a busca seguia a pilha de chamadas)
+    def __init__(self):
+        self.scopes = []
+        self.globals = {}
+        self.global_names = [None]
+        self.functions = {}
+        self.function = None
+
+    def resolveProgram(self, root):
+        # 1) VARs de nível superior, na ordem em que aparecem
+        for node in root.children:
+            if isinstance(node, VarDeC):
+                self.resolve(node)
+
+        # 2) registra as funções antes de resolver os corpos (recursão)
+        for node in root.children:
+            if isinstance(node, FuncDec):
+                if node.value in self.globals or node.value in self.functions:
+                    raise Exception(f"Variable '{node.value}' already declared.")
+
+                self.functions[node.value] = node
+
+        # 3) verifica main
+        if "main" not in self.functions:
+            raise Exception("Função 'main' não foi declarada.")
+
+        for node in root.children:
+            if isinstance(node, FuncDec):
+                self.resolve(node)
+
+        root.global_names = self.global_names
+
+        main_call = FuncCall("main", [])
+        self.resolve(main_call)
+        return main_call
+
+    def resolve(self, node):
+        getattr(self, "resolve" + type(node).__name__, self.resolveChildren)(node)
+
+    def resolveChildren(self, node):
+        for child in node.children:
+            self.resolve(child)
+
+    def declare(self, identifier, var_type, initialized):
+        name = identifier.value
+
+        if self.scopes:
+            scope = self.scopes[-1]
+            identifier.depth = 0
+            identifier.slot = self.function.nlocals
+            self.function.nlocals += 1
+            self.function.slot_names.append(name)
+        else:
+            scope = self.globals
+            if name in self.functions:
+                raise Exception(f"Variable '{name}' already declared.")
+            identifier.depth = 1
+            identifier.slot = len(self.global_names)
+            self.global_names.append(name)
+
+        if name in scope:
+            raise Exception(f"Variable '{name}' already declared.")
+
+        identifier.var_type = var_type
+        scope[name] = [identifier, initialized]
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+
+        if name in self.globals:
+            return self.globals[name]
+
+        if name in self.functions:
+            raise TypeError(f"Função '{name}' usada como variável.")
+
+        raise Exception(f"Variable '{name}' not declared.")
+
+    def bind(self, identifier):
+        declaration, initialized = self.lookup(identifier.value)
+
+        # só acontece dentro do inicializador da própria declaração
+        if not initialized:
+            raise Exception(f"Variable '{identifier.value}' used before assignment.")
+
+        identifier.depth = declaration.depth
+        identifier.slot = declaration.slot
+        identifier.var_type = declaration.var_type
+
+    def resolveIdentifier(self, node):
+        self.bind(node)
+
+    def resolveVarDeC(self, node):
+        self.declare(node.children[0], node.var_type, initialized=len(node.children) < 2)
+
+        if len(node.children) == 2:
+            self.resolve(node.children[1])
+            self.lookup(node.children[0].value)[1] = True
+
+    def resolveAssignment(self, node):
+        self.resolve(node.children[1])
+        self.bind(node.children[0])
+
+    def resolveBlock(self, node):
+        self.scopes.append({})
+        self.resolveChildren(node)
+        self.scopes.pop()
+
+    def resolveFuncDec(self, node):
+        self.function = node
+        node.nlocals = 1
+        node.slot_names = [None]
+
+        # parâmetros ficam num escopo próprio, o corpo abre outro
+        self.scopes.append({})
+        for param_node in node.children[:-1]:
+            self.declare(param_node.children[0], param_node.var_type, initialized=True)
+
+        self.resolve(node.children[-1])
+        self.scopes.pop()
+        self.function = None
+
+    def resolveReturn(self, node):
+        self.resolveChildren(node)
+        call = node.children[0]
+
+        # chamada em posição de cauda vira salto; o tipo de retorno precisa ser o mesmo,
+        # já que a verificação do chamador deixa de acontecer
+        node.tail_call = isinstance(call, FuncCall) and call.func.return_type == self.function.return_type
+
+    def resolveFuncCall(self, node):
+        for scope in reversed(self.scopes):
+            if node.value in scope:
+                raise TypeError(f"Variável '{node.value}' usada como função.")
+
+        if node.value in self.globals:
+            raise TypeError(f"Variável '{node.value}' usada como função.")
+
+        if node.value not in self.functions:
+            raise Exception(f"Variable '{node.value}' not declared.")
+
+        func_node = self.functions[node.value]
+        params = func_node.children[:-1]
+
+        if len(node.children) != len(params):
+            raise Exception(
+                f"Função '{node.value}' esperava {len(params)} argumentos, recebeu {len(node.children)}."
+            )
+
+        node.func = func_node
+        self.resolveChildren(node)
+
+
+class TypeChecker:
+    # roda uma vez, depois do Resolver: junta todos os erros de tipo do programa e troca
+    # BinOp/UnOp pela versão especializada do operador, que já não confere tipos
+    def __init__(self):
+        self.errors = []
+        self.function = None
+
+    def checkProgram(self, root, main_call):
+        self.checkChildren(root)
+        self.checkChildren(main_call)
+
+        if self.errors:
+            raise TypeError("\n".join(self.errors))
+
+    def check(self, node):
+        # devolve (nó, tipo); o nó pode ser trocado pela versão especializada
+        return getattr(self, "check" + type(node).__name__, self.checkNode)(node)
+
+    def checkChildren(self, node):
+        checked = [self.check(child) for child in node.children]
+        node.children = tuple(child for child, _ in checked)
+        return [typ for _, typ in checked]
+
+    def checkNode(self, node):
+        self.checkChildren(node)
+        return node, node.staticType()
+
+    def specialize(self, node, table):
+        specialized = table[node.value](node.value, *node.children)
+        specialized.id = node.id
+        return specialized
+
+    def checkBinOp(self, node):
+        left_type, right_type = self.checkChildren(node)
+
+        if node.value in {"+", "-", "*", "/"}:
+            if left_type != "i32" or right_type != "i32":
+                self.errors.append(f"Operação aritmética requer operandos 'i32', mas recebeu '{left_type}' e '{right_type}'")
+            typ = "i32"
+        elif node.value in {"==", ">", "<"}:
+            if left_type != right_type:
+                self.errors.append(f"Comparação requer operandos do mesmo tipo, mas recebeu '{left_type}' e '{right_type}'")
+            typ = "bool"
+        elif node.value in {"&&", "||"}:
+            if left_type != "bool" or right_type != "bool":
+                self.errors.append(f"Operação lógica requer operandos 'bool', mas recebeu '{left_type}' e '{right_type}'")
+            typ = "bool"
+        else:
+            typ = "str"
+
+        # com erro, segue com o tipo do operador para não repetir o mesmo erro acima
+        return self.specialize(node, BINARY_SPECIALIZATIONS), typ
+
+    def checkUnOp(self, node):
+        val_type, = self.checkChildren(node)
+        typ = "bool" if node.value == "!" else "i32"
+
+        if val_type != typ:
+            self.errors.append(f"Operador unário '{node.value}' requer tipo '{typ}', mas recebeu '{val_type}'")
+
+        return self.specialize(node, UNARY_SPECIALIZATIONS), typ
+
+    def checkVarDeC(self, node):
+        if len(node.children) == 2:
+            _, expr_type = self.checkChildren(node)
+
+            if node.var_type != expr_type:
+                self.errors.append(f"Tipo de variável '{node.children[0].value}' não corresponde ao tipo da expressão.")
+
+        return node, None
+
+    def checkAssignment(self, node):
+        identifier = node.children[0]
+        _, actual_type = self.checkChildren(node)
+
+        if identifier.var_type != actual_type:
+            self.errors.append(f"Type mismatch in assignment to '{identifier.value}'. Expected '{identifier.var_type}', got '{actual_type}'.")
+
+        return node, None
+
+    def checkCondition(self, node, keyword):
+        condition_type = self.checkChildren(node)[0]
+
+        if condition_type != "bool":
+            self.errors.append(f"Condição do '{keyword}' deve ser do tipo 'bool', mas recebeu '{condition_type}'")
+
+        return node, None
+
+    def checkIf(self, node):
+        return self.checkCondition(node, "if")
+
+    def checkWhile(self, node):
+        return self.checkCondition(node, "while")
+
+    def checkFuncDec(self, node):
+        self.function = node
+        self.checkChildren(node)
+        self.function = None
+        return node, None
+
+    def checkReturn(self, node):
+        typ, = self.checkChildren(node)
+
+        if typ != self.function.return_type:
+            self.errors.append(
+                f"Tipo de retorno da função '{self.function.value}' incompatível. "
+                f"Esperado '{self.function.return_type}', recebido '{typ}'."
+            )
+
+        return node, None
+
+    def checkFuncCall(self, node):
+        arg_types = self.checkChildren(node)
+
+        for param_node, typ in zip(node.func.children[:-1], arg_types):
+            if typ != param_node.var_type:
+                self.errors.append(
+                    f"Tipo do argumento '{param_node.children[0].value}' incompatível. "
+                    f"Esperado '{param_node.var_type}', recebido '{typ}'."
+                )
+
+        return node, node.func.return_type
+
+
+# falha no cache de memoização: None é um resultado válido (funções void)
+MEMO_MISS = object()
+
+
+class MemoCache:
+    # LRU limitado: o mais recente fica no fim do OrderedDict
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        result = self.entries.get(key, MEMO_MISS)
+
+        if result is MEMO_MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return result
+
+    def store(self, key, result):
+        self.entries[key] = result
+
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+class PurityAnalyzer:
+    # pura: sem print/read, sem atribuir globais, sem ler globais que mudam e
+    # chamando só funções puras; o resultado depende apenas dos argumentos
+    def analyzeProgram(self, root):
+        functions = [node for node in root.children if isinstance(node, FuncDec)]
+        mutable_globals = set()
+
+        for func in functions:
+            for node in self.walk(func.children[-1]):
+                if isinstance(node, Assignment) and node.children[0].depth == 1:
+                    mutable_globals.add(node.children[0].slot)
+
+        callees = {}
+        for func in functions:
+            func.pure = True
+            callees[func] = set()
+
+            for node in self.walk(func.children[-1]):
+                if isinstance(node, (Print, Read)):
+                    func.pure = False
+                elif isinstance(node, Identifier) and node.depth == 1 and node.slot in mutable_globals:
+                    func.pure = False
+                elif isinstance(node, FuncCall):
+                    callees[func].add(node.func)
+
+        # uma chamada impura contamina quem chama, até estabilizar
+        changed = True
+        while changed:
+            changed = False
+            for func in functions:
+                if func.pure and any(not callee.pure for callee in callees[func]):
+                    func.pure = False
+                    changed = True
+
+        return [func for func in functions if func.pure]
+
+    @staticmethod
+    def walk(node):
+        pending = [node]
+
+        while pending:
+            node = pending.pop()
+            yield node
+            pending.extend(node.children)
+
+
+class Profiler:
+    # troca o Evaluate de cada classe de nó por uma versão medida só enquanto está instalado:
+    # desligado, o interpretador roda exatamente o código de sempre
+    def __init__(self):
+        self.node_stats = {}
+        self.function_stats = {}
+        self.loop_iterations = {}
+        self.call_sites = {}
+        self.stacks = {}
+        self.function_stack = ["<global>"]
+        self.call_starts = [0.0]
+        self.stack_key = "<global>"
+        self.child_time = [0.0]
+        self.originals = {}
+
+    def install(self, root):
+        # o corpo de cada while conta uma iteração por execução
+        self.loop_bodies = {}
+
+        for func in root.children:
+            name = func.value if isinstance(func, FuncDec) else "<global>"
+
+            for node in PurityAnalyzer.walk(func):
+                if isinstance(node, While):
+                    self.loop_bodies[id(node.children[1])] = node.id
+                    self.loop_iterations[node.id] = [name, 0]
+
+        for cls in self.nodeClasses():
+            self.originals[cls] = cls.Evaluate
+
+            if cls is FuncCall:
+                cls.Evaluate = self.wrapCall(cls.Evaluate)
+            elif cls is Block:
+                cls.Evaluate = self.wrapBlock(cls.Evaluate)
+            else:
+                cls.Evaluate = self.wrap(cls.__name__, cls.Evaluate)
+
+        # chamadas em cauda rodam no laço do FuncCall que as originou, sem passar por Evaluate
+        self.original_tail_run = TailCall.run
+        TailCall.run = self.wrapTailCall(TailCall.run)
+
+    def uninstall(self):
+        for cls, evaluate in self.originals.items():
+            cls.Evaluate = evaluate
+
+        if self.originals:
+            TailCall.run = self.original_tail_run
+
+        self.originals = {}
+
+    @staticmethod
+    def nodeClasses():
+        # inclui as versões especializadas (IntAdd é subclasse de BinOp)
+        classes = []
+        pending = Node.__subclasses__()
+
+        while pending:
+            cls = pending.pop()
+            pending.extend(cls.__subclasses__())
+
+            if "Evaluate" in cls.__dict__:
+                classes.append(cls)
+
+        return classes
+
+    def wrap(self, name, evaluate):
+        stats = self.node_stats.setdefault(name, [0, 0.0, 0.0])
+        child_time = self.child_time
+        stacks = self.stacks
+        clock = time.perf_counter
+
+        def profiled(node, frame):
+            stats[0] += 1
+            child_time.append(0.0)
+            start = clock()
+
+            try:
+                return evaluate(node, frame)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - child_time.pop()
+                child_time[-1] += elapsed
+                stats[1] += elapsed
+                stats[2] += own
+                stacks[self.stack_key] = stacks.get(self.stack_key, 0.0) + own
+
+        return profiled
+
+    def wrapBlock(self, evaluate):
+        profiled = self.wrap("Block", evaluate)
+        loop_bodies = self.loop_bodies
+        loop_iterations = self.loop_iterations
+
+        def block(node, frame):
+            loop_id = loop_bodies.get(id(node))
+
+            if loop_id is not None:
+                loop_iterations[loop_id][1] += 1
+
+            return profiled(node, frame)
+
+        return block
+
+    def wrapCall(self, evaluate):
+        profiled = self.wrap("FuncCall", evaluate)
+        clock = time.perf_counter
+
+        def call(node, frame):
+            name = node.value
+            caller = self.function_stack[-1]
+            site = self.call_sites.setdefault(node.id, [caller, name, 0])
+            site[2] += 1
+
+            self.function_stack.append(name)
+            self.call_starts.append(0.0)
+            previous_key = self.stack_key
+            self.stack_key = f"{previous_key};{name}"
+            self.beginActivation(name, clock())
+
+            try:
+                return profiled(node, frame)
+            finally:
+                # depois de chamadas em cauda o topo pode ser outra função que não a chamada
+                self.endActivation(clock())
+                self.function_stack.pop()
+                self.call_starts.pop()
+                self.stack_key = previous_key
+
+        return call
+
+    def wrapTailCall(self, run):
+        clock = time.perf_counter
+
+        def tail(tail_call):
+            name = tail_call.call.value
+            caller = self.function_stack[-1]
+            site = self.call_sites.setdefault(tail_call.call.id, [caller, name, 0])
+            site[2] += 1
+
+            # a ativação atual termina aqui e a do chamado ocupa o lugar dela na pilha
+            now = clock()
+            self.endActivation(now)
+            self.function_stack[-1] = name
+            self.stack_key = f"{self.stack_key.rsplit(';', 1)[0]};{name}"
+            self.beginActivation(name, now)
+
+            return run(tail_call)
+
+        return tail
+
+    def beginActivation(self, name, now):
+        # recursão: o tempo total só conta a ativação mais externa de cada função
+        stats = self.function_stats.setdefault(name, [0, 0.0, 0])
+        stats[0] += 1
+        stats[2] += 1
+        self.call_starts[-1] = now
+
+    def endActivation(self, now):
+        stats = self.function_stats[self.function_stack[-1]]
+        stats[2] -= 1
+
+        if stats[2] == 0:
+            stats[1] += now - self.call_starts[-1]
+
+    def report(self, out=None):
+        # resolvido na chamada: no modo em lote o stderr é redirecionado por arquivo
+        out = out or sys.stderr
+
+        print("== perfil por tipo de nó (tempo próprio)", file=out)
+        for name, (count, total, own) in sorted(self.node_stats.items(), key=lambda item: -item[1][2]):
+            if count:
+                print(f"{name:>12} {count:>12} execuções {own * 1000:12.3f} ms próprio {total * 1000:12.3f} ms total",
+                      file=out)
+
+        print("== perfil por função", file=out)
+        for name, (calls, total, _) in sorted(self.function_stats.items(), key=lambda item: -item[1][1]):
+            print(f"{name:>12} {calls:>12} chamadas {total * 1000:12.3f} ms", file=out)
+
+        if self.loop_iterations:
+            print("== iterações por while (Node.id)", file=out)
+            for loop_id, (function, iterations) in sorted(self.loop_iterations.items(), key=lambda item: -item[1][1]):
+                print(f"{loop_id:>12} {iterations:>12} iterações em {function}", file=out)
+
+        if self.call_sites:
+            print("== chamadas por FuncCall (Node.id)", file=out)
+            for call_id, (caller, callee, count) in sorted(self.call_sites.items(), key=lambda item: -item[1][2]):
+                print(f"{call_id:>12} {count:>12} vezes {caller} -> {callee}", file=out)
+
+    def toJSON(self):
+        return {
+            "nodes": {name: {"count": count, "total_seconds": total, "self_seconds": own}
+                      for name, (count, total, own) in self.node_stats.items() if count},
+            "functions": {name: {"calls": calls, "total_seconds": total}
+                          for name, (calls, total, _) in self.function_stats.items()},
+            "loops": {str(loop_id): {"function": function, "iterations": iterations}
+                      for loop_id, (function, iterations) in self.loop_iterations.items()},
+            "calls": {str(call_id): {"caller": caller, "callee": callee, "count": count}
+                      for call_id, (caller, callee, count) in self.call_sites.items()},
+        }
+
+    def writeCollapsed(self, path):
+        # formato do flamegraph.pl: "pilha;de;funções microssegundos"
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write(f"{stack} {round(seconds * 1e6)}\n")
+
+
+I32_MIN = -2 ** 31
+I32_MAX = 2 ** 31 - 1
+
+CONSTANT_TYPES = {IntVal: "i32", BoolVal: "bool", StrVal: "str"}
+
+
+class ConstantFolder:
+    # dobra subárvores de operandos constantes e propaga o valor constante de
+    # variáveis locais em trechos em linha reta; roda depois do Resolver, que
+    # dá a cada declaração local um slot único dentro da função
+    def __init__(self):
+        self.known = {}
+
+    def foldProgram(self, root):
+        for node in root.children:
+            # globais podem mudar em qualquer chamada: só dobra, não propaga
+            self.known = {}
+            self.fold(node)
+
+    def fold(self, node):
+        # IntAdd, Less etc. dobram como o BinOp/UnOp de que vêm
+        for cls in type(node).__mro__:
+            method = getattr(self, "fold" + cls.__name__, None)
+
+            if method:
+                return method(node)
+
+        return self.foldChildren(node)
+
+    def foldChildren(self, node):
+        node.children = tuple(self.fold(child) for child in node.children)
+        return node
+
+    @staticmethod
+    def isConstant(node):
+        return type(node) in CONSTANT_TYPES
+
+    @staticmethod
+    def constantNode(value, typ):
+        if typ == "i32":
+            # fora da faixa de i32 o interpretador e o assembly divergem
+            return IntVal(value) if I32_MIN <= value <= I32_MAX else None
+        elif typ == "bool":
+            return BoolVal("true" if value else "false")
+        elif typ == "str":
+            return StrVal(str(value))
+        return None
+
+    def evaluate(self, node):
+        # usa o próprio Evaluate do nó: mesma semântica do interpretador,
+        # e operações que falhariam ficam para a execução
+        try:
+            value = node.Evaluate(None)
+        except (ValueError, ZeroDivisionError):
+            return node
+
+        return self.constantNode(value, node.staticType()) or node
+
+    def foldBinOp(self, node):
+        self.foldChildren(node)
+        left, right = node.children
+
+        if not (self.isConstant(left) and self.isConstant(right)):
+            return node
+
+        # "/" arredonda para baixo aqui e trunca no idiv: só dobra sem sinais negativos
+        if node.value == "/" and isinstance(left, IntVal) and isinstance(right, IntVal) and (left.value < 0 or right.value < 0):
+            return node
+
+        return self.evaluate(node)
+
+    def foldUnOp(self, node):
+        self.foldChildren(node)
+        return self.evaluate(node) if self.isConstant(node.children[0]) else node
+
+    def foldIdentifier(self, node):
+        if node.depth == 0 and node.slot in self.known:
+            constant = self.known[node.slot]
+            return type(constant)(constant.value)
+        return node
+
+    def remember(self, identifier, value):
+        if identifier.depth != 0:
+            return
+
+        if CONSTANT_TYPES.get(type(value)) == identifier.var_type:
+            self.known[identifier.slot] = value
+        else:
+            self.known.pop(identifier.slot, None)
+
+    def foldVarDeC(self, node):
+        if len(node.children) == 2:
+            node.replaceChild(1, self.fold(node.children[1]))
+            self.remember(node.children[0], node.children[1])
+        else:
+            self.remember(node.children[0], None)
+        return node
+
+    def foldAssignment(self, node):
+        node.replaceChild(1, self.fold(node.children[1]))
+        self.remember(node.children[0], node.children[1])
+        return node
+
+    def foldIf(self, node):
+        node.replaceChild(0, self.fold(node.children[0]))
+        before = dict(self.known)
+        node.replaceChild(1, self.fold(node.children[1]))
+        after_then = self.known
+        self.known = before
+
+        if len(node.children) > 2:
+            node.replaceChild(2, self.fold(node.children[2]))
+
+        # só sobrevive o que os dois caminhos concordam
+        self.known = {
+            slot: value for slot, value in after_then.items()
+            if slot in self.known and type(self.known[slot]) is type(value) and self.known[slot].value == value.value
+        }
+        return node
+
+    def foldWhile(self, node):
+        # o que o laço atribui deixa de ser constante já na condição
+        for slot in self.assignedSlots(node):
+            self.known.pop(slot, None)
+
+        before = dict(self.known)
+        self.foldChildren(node)
+        self.known = before
+        return node
+
+    def foldFuncDec(self, node):
+        self.known = {}
+        node.replaceChild(-1, self.fold(node.children[-1]))
+        return node
+
+    def assignedSlots(self, node):
+        slots = set()
+        pending = [node]
+
+        while pending:
+            current = pending.pop()
+
+            if isinstance(current, (Assignment, VarDeC)):
+                if current.children[0].depth == 0:
+                    slots.add(current.children[0].slot)
+
+            pending.extend(current.children)
+
+        return slots
+
+
+class DeadCodeEliminator:
+    # remove o que não muda o que o programa faz: comandos inalcançáveis, ramos de
+    # condição constante e atribuições a locais cujo valor nunca é lido; depois
+    # renumera os slots para o quadro não reservar espaço para variáveis que sumiram
+    def __init__(self):
+        self.removed = 0
+        self.initialized = set()
+
+    def eliminateProgram(self, root):
+        for func in root.children:
+            if isinstance(func, FuncDec):
+                self.initialized = self.initializedSlots(root, func)
+                body = func.children[-1]
+                self.prune(body)
+                # ao fim da função nenhuma local é lida
+                self.liveness(body, set(), remove=True)
+                self.compactSlots(func)
+
+        return self.removed
+
+    @staticmethod
+    def initializedSlots(root, func):
+        # (depth, slot) que sempre têm valor onde são visíveis: parâmetros e variáveis
+        # declaradas com valor; as demais podem gerar "used before assignment" ao serem lidas
+        initialized = {
+            (1, node.children[0].slot) for node in root.children
+            if isinstance(node, VarDeC) and len(node.children) == 2
+        }
+        initialized.update((0, param.children[0].slot) for param in func.children[:-1])
+        initialized.update(
+            (0, node.children[0].slot) for node in PurityAnalyzer.walk(func.children[-1])
+            if isinstance(node, VarDeC) and len(node.children) == 2
+        )
+        return initialized
+
+    @staticmethod
+    def size(node):
+        return sum(1 for _ in PurityAnalyzer.walk(node))
+
+    def prune(self, node):
+        # devolve o comando que fica no lugar de node, ou None se nada fica
+        if isinstance(node, Block):
+            statements = []
+
+            for index, stmt in enumerate(node.children):
+                stmt = self.prune(stmt)
+
+                # bloco que ficou vazio (ex.: ramo de if (true) sem comandos)
+                if stmt is None or (isinstance(stmt, Block) and not stmt.children):
+                    if stmt is not None:
+                        self.removed += 1
+                    continue
+
+                statements.append(stmt)
+
+                if self.terminates(stmt):
+                    self.removed += sum(self.size(rest) for rest in node.children[index + 1:])
+                    break
+
+            node.children = tuple(statements)
+            return node
+
+        if isinstance(node, If):
+            condition = node.children[0]
+
+            if isinstance(condition, BoolVal):
+                kept = node.children[1] if condition.value == "true" else (node.children[2] if len(node.children) > 2 else None)
+                self.removed += self.size(node) - (self.size(kept) if kept else 0)
+                return self.prune(kept) if kept else None
+
+            node.children = (condition,) + tuple(self.prune(branch) for branch in node.children[1:])
+            return node
+
+        if isinstance(node, While):
+            if isinstance(node.children[0], BoolVal) and node.children[0].value == "false":
+                self.removed += self.size(node)
+                return None
+
+            self.prune(node.children[1])
+            return node
+
+        if isinstance(node, NoOp):
+            self.removed += 1
+            return None
+
+        return node
+
+    def terminates(self, stmt):
+        # nada depois dele roda: não há break, então while (true) só sai por return
+        if isinstance(stmt, Return):
+            return True
+        if isinstance(stmt, Block):
+            return any(self.terminates(child) for child in stmt.children)
+        if isinstance(stmt, If):
+            return len(stmt.children) > 2 and self.terminates(stmt.children[1]) and self.terminates(stmt.children[2])
+        if isinstance(stmt, While):
+            return isinstance(stmt.children[0], BoolVal) and stmt.children[0].value == "true"
+        return False
+
+    def isRemovable(self, node):
+        # calcular e descartar não muda nada: sem chamadas, leituras nem erros possíveis
+        for child in PurityAnalyzer.walk(node):
+            if isinstance(child, (FuncCall, Read)):
+                return False
+            if isinstance(child, BinOp) and child.canTrap():
+                return False
+            if isinstance(child, Identifier) and (child.depth, child.slot) not in self.initialized:
+                return False
+
+        return True
+
+    @staticmethod
+    def uses(node):
+        return {child.slot for child in PurityAnalyzer.walk(node) if isinstance(child, Identifier) and child.depth == 0}
+
+    def isDeadStore(self, stmt, live):
+        if not isinstance(stmt, (Assignment, VarDeC)):
+            return False
+
+        identifier = stmt.children[0]
+        return (
+            identifier.depth == 0 and identifier.slot not in live
+            and (len(stmt.children) == 1 or self.isRemovable(stmt.children[1]))
+        )
+
+    def liveness(self, node, live, remove):
+        # devolve as locais lidas antes de escritas a partir do início de node,
+        # sabendo que live são as lidas depois dele; com remove, apaga os stores mortos
+        if isinstance(node, Block):
+            kept = []
+
+            for stmt in reversed(node.children):
+                if self.isDeadStore(stmt, live):
+                    if remove:
+                        self.removed += self.size(stmt)
+                    continue
+
+                live = self.liveness(stmt, live, remove)
+                kept.append(stmt)
+
+            if remove:
+                node.children = tuple(reversed(kept))
+
+            return live
+
+        if isinstance(node, (Assignment, VarDeC)):
+            identifier = node.children[0]
+
+            if identifier.depth == 0:
+                live = live - {identifier.slot}
+
+            return live | self.uses(node.children[1]) if len(node.children) == 2 else live
+
+        if isinstance(node, If):
+            condition, then_branch = node.children[:2]
+            live_else = self.liveness(node.children[2], live, remove) if len(node.children) > 2 else live
+            return self.uses(condition) | self.liveness(then_branch, live, remove) | live_else
+
+        if isinstance(node, While):
+            condition, body = node.children
+            # a condição roda de novo depois de cada volta: itera até estabilizar
+            live_in = live | self.uses(condition)
+
+            while True:
+                updated = live | self.uses(condition) | self.liveness(body, live_in, False)
+
+                if updated == live_in:
+                    break
+
+                live_in = updated
+
+            if remove:
+                self.liveness(body, live_in, True)
 
-        while condition_value:
-            result = self.children[1].Evaluate(symbol_table)
-            condition_value, _ = self.children[0].Evaluate(symbol_table)
+            return live_in
 
-        return result
-    
-    def Generate(self, symbol_table):
-        loop_id = self.id
-        start_label = f"loop_{loop_id}"
-        end_label = f"exit_{loop_id}"
+        if isinstance(node, Return):
+            return self.uses(node)
 
-        code = [f"{start_label}:"]
-        code += self.children[0].Generate(symbol_table)
-        code += ["cmp eax, 0", f"je {end_label}"]
-        code += self.children[1].Generate(symbol_table)
-        code.append(f"jmp {start_label}")
-        code.append(f"{end_label}:")
-        return code
+        return live | self.uses(node)
 
+    def compactSlots(self, func):
+        identifiers = [node for node in PurityAnalyzer.walk(func.children[-1]) if isinstance(node, Identifier) and node.depth == 0]
+        nparams = len(func.children) - 1
+        mapping = {slot: slot for slot in range(1, nparams + 1)}
 
-class Block(Node):
-    def __init__(self, statements):
-        super().__init__("block", statements)
+        for slot in sorted({identifier.slot for identifier in identifiers}):
+            if slot not in mapping:
+                mapping[slot] = len(mapping) + 1
 
-    def Evaluate(self, symbol_table):
-        # a cada bloco, criamos um novo escopo filho
-        new_scope = SymbolTable(parent=symbol_table)
-        for stmt in self.children:
-            stmt.Evaluate(new_scope)
-        return (None, "void")
+        slot_names = [None] * (len(mapping) + 1)
+        for old, new in mapping.items():
+            slot_names[new] = func.slot_names[old]
 
-    def Generate(self, symbol_table):
-        code = []
-        for stmt in self.children:
-            code += stmt.Generate(symbol_table)
-        return code
+        for identifier in identifiers:
+            identifier.slot = mapping[identifier.slot]
 
+        func.slot_names = slot_names
+        func.nlocals = len(slot_names)
 
-class Read(Node):
+
+class LoopInvariantHoister:
+    # tira de cada while as expressões que dão sempre o mesmo valor no laço: são
+    # calculadas uma vez em temporários declarados logo antes dele; roda depois do
+    # ConstantFolder, então vale para o interpretador, a VM e o x86
     def __init__(self):
-        super().__init__("read", [])
+        self.function = None
+        self.initialized = set()
+        self.hoisted = 0
 
-    def Evaluate(self, symbol_table):
-        value = input()
+    def hoistProgram(self, root):
+        for func in root.children:
+            if not isinstance(func, FuncDec):
+                continue
 
-        try:
-            return (int(value), "i32")
-        except ValueError:
-            raise ValueError(f"Entrada inválida: {value}. Esperado um número inteiro.")
-        
-    def Generate(self, symbol_table):
-        return [
-            "push scan_int",
-            "push format_in",
-            "call scanf",
-            "add esp, 8",
-            "mov eax, [scan_int]"
-        ]
+            # fora dessas, ler uma variável antes do laço pode falhar onde o laço não leria
+            self.function = func
+            self.initialized = DeadCodeEliminator.initializedSlots(root, func)
+            self.hoistStatements(func.children[-1])
 
+        return self.hoisted
 
-class FuncDec(Node):
-    def __init__(self, name, parameters, return_type, body):
-        super().__init__(name, parameters + [body])
-        self.return_type = return_type
+    def hoistStatements(self, node):
+        if not isinstance(node, Block):
+            for child in node.children:
+                self.hoistStatements(child)
+            return
 
-    def Evaluate(self, symbol_table):
-        global_table = symbol_table
+        statements = []
 
-        while global_table.parent is not None:
-            global_table = global_table.parent
+        for stmt in node.children:
+            if isinstance(stmt, While):
+                statements.extend(self.hoistLoop(stmt))
 
-        global_table.declare(self.value, self.return_type)
+            statements.append(stmt)
+            # laços internos, já sem o que é invariante no de fora
+            self.hoistStatements(stmt)
 
-        global_table.set(self.value, (self, self.return_type, {"is_function": True}))
+        node.children = tuple(statements)
 
-        return (None, None)
+    def hoistLoop(self, loop):
+        self.assigned = set()
+        self.calls = False
 
-    def Generate(self, symbol_table):
-        return []
+        for node in PurityAnalyzer.walk(loop):
+            if isinstance(node, (Assignment, VarDeC)):
+                identifier = node.children[0]
+                self.assigned.add((identifier.depth, identifier.slot))
+            elif isinstance(node, FuncCall):
+                self.calls = True
 
+        self.declarations = []
+        self.temporaries = {}
+        self.visit(loop)
+        return self.declarations
 
-class FuncCall(Node):
-    def __init__(self, name, arguments):
-        super().__init__(name, arguments)
+    def visit(self, node):
+        # devolve se o nó é invariante; os filhos invariantes de um nó que não é viram temporários
+        invariant = [self.visit(child) for child in node.children]
 
-    def Evaluate(self, symbol_table):
-        # recupera a entrada da função
-        func_entry = symbol_table.get(self.value)
-        func_node, return_type, metadata = func_entry
-        params, body = func_node.children[:-1], func_node.children[-1]
+        if self.isInvariant(node, invariant):
+            return True
 
-        # 1) checa quantidade de argumentos
-        if len(self.children) != len(params):
-            raise Exception(
-                f"Função '{self.value}' esperava {len(params)} argumentos, recebeu {len(self.children)}."
-            )
+        for index, child in enumerate(node.children):
+            if invariant[index] and isinstance(child, (BinOp, UnOp)):
+                node.replaceChild(index, self.temporary(child))
 
-        # 2) prepara escopo e inicializa parâmetros
-        new_scope = SymbolTable(parent=symbol_table)
-        for param_node, arg_node in zip(params, self.children):
-            pname = param_node.children[0].value
-            ptype = param_node.children[1]
-            v, t = arg_node.Evaluate(symbol_table)
-            if t != ptype:
-                raise TypeError(f"Tipo do argumento '{pname}' incompatível. Esperado '{ptype}', recebido '{t}'.")
-            new_scope.declare(pname, ptype)
-            new_scope.set(pname, (v, t))
+        return False
 
-        # 3) executa corpo e captura ReturnValue
-        try:
-            body.Evaluate(new_scope)
-            result = (None, "void")
-        except ReturnValue as rv:
-            result = (rv.value, rv.typ)
+    def isInvariant(self, node, invariant):
+        if type(node) in CONSTANT_TYPES:
+            return True
 
-        # 4) verifica tipo de retorno
-        if result[1] != return_type:
-            raise TypeError(
-                f"Tipo de retorno da função '{self.value}' incompatível. "
-                f"Esperado '{return_type}', recebido '{result[1]}'."
-            )
-        return result
+        if isinstance(node, Identifier):
+            key = (node.depth, node.slot)
+            # uma chamada dentro do laço pode mudar qualquer global
+            return key in self.initialized and key not in self.assigned and not (node.depth == 1 and self.calls)
 
-    def Generate(self, symbol_table):
-        return []
+        if isinstance(node, BinOp):
+            # a divisão pode não rodar no laço original: só sai dele se nunca falha
+            return not node.canTrap() and all(invariant)
 
-class ReturnValue(Exception):
-    def __init__(self, value, typ):
-        super().__init__()
-        self.value = value
-        self.typ = typ
+        return isinstance(node, UnOp) and all(invariant)
 
-class Return(Node):
-    def __init__(self, expression):
-        super().__init__("return", [expression])
+    @staticmethod
+    def signature(node):
+        if isinstance(node, Identifier):
+            return (node.depth, node.slot)
 
-    def Evaluate(self, symbol_table):
-        value, typ = self.children[0].Evaluate(symbol_table)
-        raise ReturnValue(value, typ)
+        return (type(node).__name__, node.value) + tuple(LoopInvariantHoister.signature(child) for child in node.children)
 
-    def Generate(self, symbol_table):
-        return []
+    def temporary(self, expression):
+        # a mesma expressão repetida no laço usa um só temporário
+        signature = self.signature(expression)
+        declared = self.temporaries.get(signature)
 
+        if declared is None:
+            func = self.function
+            name = f"@inv{self.hoisted}"
+            self.hoisted += 1
 
-class NoOp(Node):
-    def __init__(self):
-        super().__init__(None, [])
+            declared = Identifier(name)
+            declared.depth = 0
+            declared.slot = func.nlocals
+            declared.var_type = expression.staticType()
+            func.nlocals += 1
+            func.slot_names.append(name)
 
+            self.initialized.add((0, declared.slot))
+            self.declarations.append(VarDeC(declared, declared.var_type, expression))
+            self.temporaries[signature] = declared
 
-    def Evaluate(self, symbol_table):
-        return (None, None)
-    
-    def Generate(self, symbol_table):
-        return []
+        use = Identifier(declared.value)
+        use.depth, use.slot, use.var_type = declared.depth, declared.slot, declared.var_type
+        return use
 
 
 class PrePro:
@@ -606,11 +2915,33 @@ class PrePro:
 
 
 class Token:
+    __slots__ = ("type", "value")
+
     def __init__(self, type: str, value):
         self.type = type
         self.value = value
 
 
+# um único padrão: espaços iniciais e, opcionalmente, um lexema; o grupo
+# que casou (lastgroup) decide o tipo do token
+TOKEN_REGEX = re.compile(r"""
+    [ \n\r\t]*
+    (?:
+        (?P<INTEGER>\d+)
+      | (?P<IDENTIFIER>[^\W\d_]\w*)
+      | "(?P<STRING>[^"]*)"
+      | (?P<SYMBOL>\+\+|==|&&|\|\||[-+*/(){}=;:,!<>])
+    )?
+""", re.VERBOSE)
+
+SYMBOLS = {
+    "++": "CONCAT", "+": "PLUS", "-": "MINUS", "*": "MULT", "/": "DIV",
+    "(": "LPAREN", ")": "RPAREN", "{": "LBRACE", "}": "RBRACE",
+    "==": "EQUAL", "=": "ASSIGN", ";": "SEMI", ":": "COLON", ",": "COMMA",
+    "&&": "AND", "||": "OR", "!": "NOT", ">": "GREATER", "<": "LESS",
+}
+
+
 class Tokenizer:
     def __init__(self, source: str, position: int, next: Token):
         self.source = source
@@ -624,104 +2955,168 @@ class Tokenizer:
             "true": "BOOL", "false": "BOOL", "fn": "FUNC", "return": "RETURN",
             "void": "TYPE_VOID"
         }
+        self.scanner = self.scan()
     
     def selectNext(self):
-        while self.position < len(self.source) and self.source[self.position] in {' ', '\n', '\r', '\t'}:
-            self.position += 1
-
-        if self.position < len(self.source):
-            char = self.source[self.position]
+        self.next = next(self.scanner)
 
-            if char.isdigit():
-                num = ''
-                
-                while self.position < len(self.source) and self.source[self.position].isdigit():
-                    num += self.source[self.position]
-                    self.position += 1
-                
-                if self.position < len(self.source) and self.source[self.position].isalpha():
-                    raise ValueError(f"Erro de sintaxe: número seguido de letra sem separação: {num}{self.source[self.position]}")
-
-                self.next = Token("INTEGER", int(num))
-                return
-            elif char.isalpha():
-                ident = ''
+    def scan(self):
+        # um único finditer percorre o arquivo e cada lexema é fatiado direto da fonte
+        source = self.source
+        keywords = self.keywords
+        # tokens de símbolos não carregam nada além do lexema: uma instância basta
+        symbol_tokens = {symbol: Token(token_type, symbol) for symbol, token_type in SYMBOLS.items()}
 
-                while self.position < len(self.source) and (self.source[self.position].isalnum() or self.source[self.position] == '_'):
-                    ident += self.source[self.position]
-                    self.position += 1
+        for match in TOKEN_REGEX.finditer(source, self.position):
+            kind = match.lastgroup
+            self.position = match.end()
 
-                token_type = self.keywords.get(ident, "IDENTIFIER")
+            if kind == "IDENTIFIER":
+                # nomes e tipos se repetem por todo o programa: uma cópia de cada string
+                ident = sys.intern(match.group(kind))
+                token_type = keywords.get(ident, "IDENTIFIER")
 
                 if token_type != "IDENTIFIER" and ident[0].isupper():
                     raise ValueError(f"Erro: Identificadores não podem começar com letra maiúscula: {ident}")
-                
-                self.next = Token(token_type, ident)
-                return
-            elif char == '"':
-                self.position += 1
-                string_val = ''
 
-                while self.position < len(self.source) and self.source[self.position] != '"':
-                    string_val += self.source[self.position]
-                    self.position += 1
+                yield Token(token_type, ident)
+            elif kind == "SYMBOL":
+                yield symbol_tokens[match.group(kind)]
+            elif kind == "INTEGER":
+                num = match.group(kind)
+
+                if self.position < len(source) and source[self.position].isalpha():
+                    raise ValueError(f"Erro de sintaxe: número seguido de letra sem separação: {num}{source[self.position]}")
+
+                yield Token("INTEGER", int(num))
+            elif kind == "STRING":
+                yield Token("STRING", match.group(kind))
+            elif self.position >= len(source):
+                break
+            elif source[self.position] == '"':
+                raise ValueError("String não fechada corretamente com aspas.")
+            else:
+                raise ValueError("Caractere inválido")
+
+        eof = Token("EOF", None)
 
-                if self.position >= len(self.source) or self.source[self.position] != '"':
-                    raise ValueError("String não fechada corretamente com aspas.")
+        while True:
+            yield eof
 
-                self.position += 1  # Consumir aspas finais
-                self.next = Token("STRING", string_val)
-                return
-            elif char == '+' and self.position + 1 < len(self.source) and self.source[self.position + 1] == '+':
-                self.next = Token("CONCAT", '++')
-                self.position += 2
+    def tokens(self):
+        # todos os tokens restantes do arquivo, terminando no EOF
+        for token in self.scanner:
+            yield token
+
+            if token.type == "EOF":
                 return
-            elif char == '+':
-                self.next = Token("PLUS", char)
-            elif char == '-':
-                self.next = Token("MINUS", char)
-            elif char == '*':
-                self.next = Token("MULT", char)
-            elif char == '/':
-                self.next = Token("DIV", char)
-            elif char == '(': 
-                self.next = Token("LPAREN", char)
-            elif char == ')':
-                self.next = Token("RPAREN", char)
-            elif char == '{': 
-                self.next = Token("LBRACE", char)
-            elif char == '}': 
-                self.next = Token("RBRACE", char)
-            elif char == "=":
-                if self.position + 1 < len(self.source) and self.source[self.position + 1] == "=":
-                    self.next = Token("EQUAL", char * 2)
-                    self.position += 1
-                else:
-                    self.next = Token("ASSIGN", char)
-            elif char == ';': 
-                self.next = Token("SEMI", char)
-            elif char == ':': 
-                self.next = Token("COLON", char)
-            elif char == ",":
-                self.next = Token("COMMA", char)
-            elif char == "&" and self.position + 1 < len(self.source) and self.source[self.position + 1] == "&":
-                self.next = Token("AND", char * 2)
-                self.position += 1
-            elif char == "|" and self.position + 1 < len(self.source) and self.source[self.position + 1] == "|":
-                self.next = Token("OR", char * 2)
-                self.position += 1
-            elif char == "!":
-                self.next = Token("NOT", char)
-            elif char == ">":
-                self.next = Token("GREATER", char)
-            elif char == "<":
-                self.next = Token("LESS", char)
-            else:
-                raise ValueError("Caractere inválido")
-            
-            self.position += 1
-        else:
-            self.next = Token("EOF", None)
+
+
+COMPILER_VERSION = "2.3"
+
+
+class CompilationCache:
+    # artefatos serializados por hash da versão do compilador + etapa + fonte filtrado;
+    # o mtime marca o último uso e os menos usados saem quando passa do limite
+    def __init__(self, directory=".zigcache", max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        # mudar o próprio compilador invalida tudo, mesmo sem trocar COMPILER_VERSION
+        with open(__file__, "rb") as f:
+            self.compiler_digest = hashlib.sha256(COMPILER_VERSION.encode() + f.read()).hexdigest()
+
+    def key(self, source, stage):
+        return hashlib.sha256(f"{self.compiler_digest}\0{stage}\0{source}".encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def load(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                artifact = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        # o cache é só uma otimização: outro processo pode ter removido a entrada
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+        return artifact
+
+    def store(self, key, artifact):
+        try:
+            data = pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            # árvores muito profundas ficam de fora do cache
+            return
+
+        temporary = self.path(key) + f".{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "wb") as f:
+                f.write(data)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            # falha ao gravar não impede a compilação
+            self.remove(temporary)
+            return
+
+        self.evict()
+
+    def entries(self):
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".pickle")]
+        except OSError:
+            return []
+
+        entries = []
+        for name in names:
+            try:
+                entries.append((os.stat(os.path.join(self.directory, name)), name))
+            except OSError:
+                # removida por outro processo entre o listdir e o stat
+                pass
+
+        return entries
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[0].st_mtime)
+        total = sum(stat.st_size for stat, _ in entries)
+
+        while entries and total > self.max_bytes:
+            stat, name = entries.pop(0)
+            self.remove(os.path.join(self.directory, name))
+            total -= stat.st_size
+
+    def clear(self):
+        for _, name in self.entries():
+            self.remove(os.path.join(self.directory, name))
+
+
+# tipo do token -> (precedência, operador); todos associam à esquerda
+BINARY_OPERATORS = {
+    "OR": (1, "||"),
+    "AND": (2, "&&"),
+    "EQUAL": (3, "=="),
+    "GREATER": (3, ">"),
+    "LESS": (3, "<"),
+    "PLUS": (4, "+"),
+    "MINUS": (4, "-"),
+    "CONCAT": (4, "++"),
+    "MULT": (5, "*"),
+    "DIV": (5, "/"),
+}
 
 
 class Parser:
@@ -744,10 +3139,10 @@ class Parser:
                 args = []
 
                 if self.tokenizer.next.type != "RPAREN":
-                    args.append(self.parseOrExpression())
+                    args.append(self.parseExpression())
                     while self.tokenizer.next.type == "COMMA":
                         self.tokenizer.selectNext()
-                        args.append(self.parseOrExpression())
+                        args.append(self.parseExpression())
 
                 if self.tokenizer.next.type != "RPAREN":
                     raise ValueError("Parêntese fechando esperado")
@@ -773,7 +3168,7 @@ class Parser:
             return UnOp("!", self.parseFactor())
         elif token.type == "LPAREN":
             self.tokenizer.selectNext()
-            result = self.parseOrExpression()
+            result = self.parseExpression()
 
             if self.tokenizer.next.type != "RPAREN":
                 raise ValueError("Parênteses desbalanceados")
@@ -797,86 +3192,30 @@ class Parser:
             raise ValueError(f"Token inesperado: {token.type}")
 
     
-    def parseTerm(self):
-        left = self.parseFactor()
-
-        while self.tokenizer.next.type in ("MULT", "DIV"):
-            operador = self.tokenizer.next.type
-            self.tokenizer.selectNext()
-
-            right = self.parseFactor()
-
-            if operador == "MULT":
-                left = BinOp("*", left, right)
-            elif operador == "DIV":
-                left = BinOp("/", left, right)
-
-        return left  
-
-    
-    def parseExpression(self):
-        left = self.parseTerm()
-
-        while self.tokenizer.next.type in ("PLUS", "MINUS", "CONCAT"):
-            operador = self.tokenizer.next.type
-            self.tokenizer.selectNext()
+    def parseExpression(self, min_precedence=1, left=None):
+        # precedence climbing: cadeias do mesmo nível viram um laço, a recursão só cresce com o nível
+        if left is None:
+            left = self.parseFactor()
 
-            right = self.parseTerm()
+        operator = BINARY_OPERATORS.get(self.tokenizer.next.type)
 
-            if operador == "PLUS":
-                left = BinOp("+", left, right)
-            elif operador == "MINUS":
-                left = BinOp("-", left, right)
-            elif operador == "CONCAT":
-                left = BinOp("++", left, right)
-
-        return left
-    
-    
-    def parseRelationalExpression(self):
-        left = self.parseExpression()
-
-        while self.tokenizer.next.type in ("EQUAL", "GREATER", "LESS"):
-            operador = self.tokenizer.next.type
+        while operator is not None and operator[0] >= min_precedence:
+            precedence, symbol = operator
             self.tokenizer.selectNext()
 
-            right = self.parseExpression()
-
-            if operador == "EQUAL":
-                left = BinOp("==", left, right)
-            elif operador == "GREATER":
-                left = BinOp(">", left, right)
-            elif operador == "LESS":
-                left = BinOp("<", left, right)
-
-        return left
-    
-
-    def parseAndExpression(self):
-        left = self.parseRelationalExpression()
-
-        while self.tokenizer.next.type == "AND":
-            self.tokenizer.selectNext()
+            right = self.parseFactor()
+            operator = BINARY_OPERATORS.get(self.tokenizer.next.type)
 
-            right = self.parseRelationalExpression()
+            # um operador mais forte à direita fica com o operando antes da combinação
+            while operator is not None and operator[0] > precedence:
+                right = self.parseExpression(operator[0], right)
+                operator = BINARY_OPERATORS.get(self.tokenizer.next.type)
 
-            left = BinOp("&&", left, right)
+            left = BinOp(symbol, left, right)
 
         return left
     
 
-    def parseOrExpression(self):
-        left = self.parseAndExpression()
-
-        while self.tokenizer.next.type == "OR":
-            self.tokenizer.selectNext()
-            right = self.parseAndExpression()
-
-            left = BinOp("||", left, right)
-
-        return left      
-    
-
     def parseStatement(self):
         if self.tokenizer.next.type == "SEMI":
             self.tokenizer.selectNext() 
@@ -888,7 +3227,7 @@ class Parser:
 
             if self.tokenizer.next.type == "ASSIGN":
                 self.tokenizer.selectNext()
-                expr = self.parseOrExpression()
+                expr = self.parseExpression()
 
                 if self.tokenizer.next.type != "SEMI":
                     raise ValueError("Ponto e vírgula esperado")
@@ -900,11 +3239,11 @@ class Parser:
                 args = []
 
                 if self.tokenizer.next.type != "RPAREN":
-                    args.append(self.parseOrExpression())
+                    args.append(self.parseExpression())
 
                     while self.tokenizer.next.type == "COMMA":
                         self.tokenizer.selectNext()
-                        args.append(self.parseOrExpression())
+                        args.append(self.parseExpression())
 
                 if self.tokenizer.next.type != "RPAREN":
                     raise ValueError("Parêntese fechando esperado")
@@ -924,7 +3263,7 @@ class Parser:
                 raise ValueError("Parênteses esperados após 'print'")
             
             self.tokenizer.selectNext()
-            expr = self.parseOrExpression()
+            expr = self.parseExpression()
             
             if self.tokenizer.next.type != "RPAREN":
                 raise ValueError("Parênteses fechando esperados após condição de 'print'")
@@ -943,7 +3282,7 @@ class Parser:
                 raise ValueError("Parênteses esperados após 'if'")
             
             self.tokenizer.selectNext()
-            condition = self.parseOrExpression()
+            condition = self.parseExpression()
             
             if self.tokenizer.next.type != "RPAREN":
                 raise ValueError("Parênteses fechando esperados após condição de 'if'")
@@ -965,7 +3304,7 @@ class Parser:
                 raise ValueError("Parênteses esperados após 'while'")
             
             self.tokenizer.selectNext()
-            condition = self.parseOrExpression()
+            condition = self.parseExpression()
             
             if self.tokenizer.next.type != "RPAREN":
                 raise ValueError("Parênteses fechando esperados após condição de 'while'")
@@ -976,7 +3315,7 @@ class Parser:
             return While(condition, block)
         elif self.tokenizer.next.type == "RETURN":
             self.tokenizer.selectNext()
-            expr = self.parseOrExpression()
+            expr = self.parseExpression()
             return Return(expr)
         elif self.tokenizer.next.type == "VAR":
             return self.parseVarDec()
@@ -1030,7 +3369,7 @@ class Parser:
 
             if self.tokenizer.next.type == "ASSIGN":
                 self.tokenizer.selectNext()
-                expression = self.parseOrExpression()
+                expression = self.parseExpression()
 
             if self.tokenizer.next.type != "SEMI":
                 raise ValueError("Ponto e vírgula esperado")
@@ -1113,64 +3452,769 @@ class Parser:
     
 
     @staticmethod
-    def run(code):
+    def parse(code):
         tokenizer = Tokenizer(code, 0, None)
         tokenizer.selectNext()
         if tokenizer.next.type == "EOF":
             raise ValueError("Erro: expressão não consumiu todos os tokens.")
 
         parser = Parser(tokenizer)
-        root = parser.parseProgram()
+        return parser.parseProgram()
+
+
+    @staticmethod
+    def analyzeTree(root):
+        # passes semânticos e otimizações sobre a árvore já parseada (o bench mede só isto)
+        main_call = Resolver().resolveProgram(root)
+        TypeChecker().checkProgram(root, main_call)
+        ConstantFolder().foldProgram(root)
+        root.dead_nodes = DeadCodeEliminator().eliminateProgram(root)
+        LoopInvariantHoister().hoistProgram(root)
+        return main_call
+
+
+    @staticmethod
+    def analyze(code, cache=None):
+        if cache:
+            key = cache.key(code, "ast")
+            cached = cache.load(key)
+
+            if cached:
+                root, main_call, last_id = cached
+                # nós criados depois (ex.: pelo gerador) continuam com ids únicos
+                Node.current_id = max(Node.current_id, last_id)
+                return root, main_call
+
+        root = Parser.parse(code)
+        main_call = Parser.analyzeTree(root)
+
+        if cache:
+            cache.store(key, (root, main_call, Node.current_id))
+
+        return root, main_call
+
+
+    @staticmethod
+    def run(code, memo_size=0, cache=None, profiler=None, interactive=False):
+        root, main_call = Parser.analyze(code, cache)
+        memoized = PurityAnalyzer().analyzeProgram(root) if memo_size else []
+
+        for func in memoized:
+            func.memo = MemoCache(memo_size)
+
+        if profiler:
+            profiler.install(root)
+
+        # 1) inicializa VARs de nível superior; a posição 0 guarda a própria lista
+        global_frame = [None] * len(root.global_names)
+        global_frame[0] = global_frame
+        console, ProgramIO.current = ProgramIO.current, ProgramIO(interactive)
+
+        try:
+            for node in root.children:
+                if isinstance(node, VarDeC):
+                    node.Evaluate(global_frame)
+
+            # 2) executa main
+            main_call.Evaluate(global_frame)
+        finally:
+            # a saída já produzida aparece mesmo quando a execução termina com erro
+            ProgramIO.current.flush()
+            ProgramIO.current = console
+
+            if profiler:
+                profiler.uninstall()
+
+            for func in memoized:
+                print(f"memo {func.value}: {func.memo.hits} acertos, {func.memo.misses} falhas, "
+                      f"{len(func.memo.entries)} entradas", file=sys.stderr)
 
-        # 1) declara VARs de nível superior
-        global_table = SymbolTable()
+        
+    @staticmethod
+    def generateProgram(root, main_call):
+        symbol_table = SymbolTable()
+        code_generator = Code()
+
+        # todos os nós emitem no mesmo buffer, sem listas intermediárias
+        # 1) _start inicializa os VARs de nível superior e chama main
         for node in root.children:
             if isinstance(node, VarDeC):
-                node.Evaluate(global_table)
+                node.Generate(symbol_table, code_generator)
+
+        main_call.Generate(symbol_table, code_generator)
+        code_generator.append(EXIT_SEQUENCE)
 
-        # 2) declara as funções
+        # 2) as funções vêm depois, cada uma com seu rótulo
         for node in root.children:
             if isinstance(node, FuncDec):
-                node.Evaluate(global_table)
+                node.Generate(symbol_table, code_generator)
 
-        # 3) verifica main
-        try:
-            global_table.get("main")
-        except Exception:
-            raise Exception("Função 'main' não foi declarada.")
+        # 3) rotinas de string, só as que o programa usa
+        code_generator.appendRuntime()
+        return code_generator
 
-        # 4) executa main
-        main_scope = SymbolTable(parent=global_table)
-        main_call = FuncCall("main", [])
-        main_call.Evaluate(main_scope)
 
-        
     @staticmethod
-    def geracodigo(code, filename):
-        tokenizer = Tokenizer(code, 0, None)
-        tokenizer.selectNext()
+    def geracodigo(code, filename, level=2, cache=None):
+        output_name = os.path.splitext(filename)[0] + ".asm"
+
+        if cache:
+            key = cache.key(code, f"asm-O{level}")
+            cached = cache.load(key)
+
+            if cached:
+                text, removed = cached
+                with open(output_name, "w") as f:
+                    f.write(text)
+                return removed
+
+        root, main_call = Parser.analyze(code)
+        code_generator = Parser.generateProgram(root, main_call)
+        removed = code_generator.optimize(level)
+        code_generator.dump(filename)
 
-        if tokenizer.next.type == "EOF":
-            raise ValueError("Erro: expressão não consumiu todos os tokens. Verifique a sintaxe.")
+        if cache:
+            with open(output_name) as f:
+                cache.store(key, (f.read(), removed))
 
-        parser = Parser(tokenizer)
-        root = parser.parseProgram()
-        main = FuncCall("main", [])
+        return removed
 
-        symbol_table = SymbolTable()
-        instructions = root.Generate(symbol_table)
-        code_generator = Code()
 
-        code_generator.append(instructions)
-        code_generator.dump(filename)
-    
+    @staticmethod
+    def runVM(code, cache=None, interactive=False):
+        program = None
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        raise ValueError("Uso incorreto do programa.\nUse (exemplo): python main.py 'arquivo.zig'")
+        if cache:
+            key = cache.key(code, "vm")
+            program = cache.load(key)
+
+        if program is None:
+            root, main_call = Parser.analyze(code)
+            program = BytecodeCompiler().compileProgram(root, main_call)
+
+            if cache:
+                cache.store(key, program)
+
+        stream = ProgramIO(interactive)
+
+        try:
+            VM(program, stream).run()
+        finally:
+            stream.flush()
+
+
+class Op:
+    HALT = 0
+    CONST = 1
+    LOAD = 2
+    STORE = 3
+    CLEAR = 4
+    GLOAD = 5
+    GSTORE = 6
+    GCLEAR = 7
+    ADD = 8
+    SUB = 9
+    MUL = 10
+    DIV = 11
+    NEG = 12
+    NOT = 13
+    EQ = 14
+    LT = 15
+    GT = 16
+    JUMP_IF_FALSE_OR_POP = 17
+    JUMP_IF_TRUE_OR_POP = 18
+    BOOLSTR = 19
+    CONCAT = 20
+    PRINT = 21
+    PRINT_BOOL = 22
+    READ = 23
+    JUMP = 24
+    JUMP_IF_FALSE = 25
+    CALL = 26
+    RETURN = 27
+    POP = 28
+    RAISE = 29
+    # superinstruções: operando direito constante e comparação + desvio
+    ADDK = 30
+    SUBK = 31
+    MULK = 32
+    EQK = 33
+    LTK = 34
+    GTK = 35
+    JUMP_IF_NOT_EQ = 36
+    JUMP_IF_NOT_LT = 37
+    JUMP_IF_NOT_GT = 38
+    JUMP_IF_NOT_EQK = 39
+    JUMP_IF_NOT_LTK = 40
+    JUMP_IF_NOT_GTK = 41
+    # divisor constante diferente de zero dispensa a verificação
+    DIVK = 42
+    # superinstruções com operando local: absorvem o LOAD que viria antes
+    ADDL = 43
+    SUBL = 44
+    MULL = 45
+    DIVL = 46
+    EQL = 47
+    LTL = 48
+    GTL = 49
+    ADDLK = 50
+    SUBLK = 51
+    MULLK = 52
+    DIVLK = 53
+    EQLK = 54
+    LTLK = 55
+    GTLK = 56
+    JUMP_IF_NOT_EQL = 57
+    JUMP_IF_NOT_LTL = 58
+    JUMP_IF_NOT_GTL = 59
+    JUMP_IF_NOT_EQLK = 60
+    JUMP_IF_NOT_LTLK = 61
+    JUMP_IF_NOT_GTLK = 62
+    # "x = y + k" inteiro numa instrução: o STORE seguinte vira destino
+    STORE_ADDLK = 63
+    STORE_SUBLK = 64
+
+
+BINARY_OPCODES = {
+    "+": Op.ADD, "-": Op.SUB, "*": Op.MUL, "/": Op.DIV,
+    "==": Op.EQ, "<": Op.LT, ">": Op.GT,
+}
+
+CONSTANT_OPCODES = {
+    "+": Op.ADDK, "-": Op.SUBK, "*": Op.MULK, "/": Op.DIVK,
+    "==": Op.EQK, "<": Op.LTK, ">": Op.GTK,
+}
+
+# LOAD seguido da operação: o slot do local vira o primeiro operando
+LOCAL_OPCODES = {
+    Op.ADD: Op.ADDL, Op.SUB: Op.SUBL, Op.MUL: Op.MULL, Op.DIV: Op.DIVL,
+    Op.EQ: Op.EQL, Op.LT: Op.LTL, Op.GT: Op.GTL,
+    Op.ADDK: Op.ADDLK, Op.SUBK: Op.SUBLK, Op.MULK: Op.MULLK, Op.DIVK: Op.DIVLK,
+    Op.EQK: Op.EQLK, Op.LTK: Op.LTLK, Op.GTK: Op.GTLK,
+}
+
+# (instrução anterior, instrução emitida) -> superinstrução com os operandos das duas
+FUSED_OPCODES = {
+    **{(Op.LOAD, op): fused for op, fused in LOCAL_OPCODES.items()},
+    (Op.ADDLK, Op.STORE): Op.STORE_ADDLK,
+    (Op.SUBLK, Op.STORE): Op.STORE_SUBLK,
+}
+
+# k + x é compilado como x + k: a constante não tem efeito colateral
+COMMUTATIVE_OPERATORS = {"+", "*", "=="}
+
+BRANCH_OPCODES = {
+    Op.EQ: Op.JUMP_IF_NOT_EQ, Op.LT: Op.JUMP_IF_NOT_LT, Op.GT: Op.JUMP_IF_NOT_GT,
+    Op.EQK: Op.JUMP_IF_NOT_EQK, Op.LTK: Op.JUMP_IF_NOT_LTK, Op.GTK: Op.JUMP_IF_NOT_GTK,
+    Op.EQL: Op.JUMP_IF_NOT_EQL, Op.LTL: Op.JUMP_IF_NOT_LTL, Op.GTL: Op.JUMP_IF_NOT_GTL,
+    Op.EQLK: Op.JUMP_IF_NOT_EQLK, Op.LTLK: Op.JUMP_IF_NOT_LTLK, Op.GTLK: Op.JUMP_IF_NOT_GTLK,
+}
+
+
+class BytecodeFunction:
+    def __init__(self, name, nparams, return_type):
+        self.name = name
+        self.nparams = nparams
+        self.return_type = return_type
+        self.code = []
+        self.nlocals = 0
+        self.slot_names = []
+        self.padding = []
+
+
+class BytecodeProgram:
+    def __init__(self, entry, functions, constants, global_names):
+        self.entry = entry
+        self.functions = functions
+        self.constants = constants
+        self.global_names = global_names
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.constants = []
+        self.constant_index = {}
+        self.functions = []
+        self.function_index = {}
+        self.current = None
+        self.current_function = None
+        self.last_op = -1
+        self.barrier = 0
+
+    def begin(self, bytecode):
+        self.current = bytecode
+        self.last_op = -1
+        self.barrier = 0
+
+    def emit(self, op, *operands):
+        code = self.current.code
+
+        # funde com a instrução anterior, se nenhum salto cair entre as duas
+        if self.last_op >= 0 and self.barrier != len(code):
+            fused = FUSED_OPCODES.get((code[self.last_op], op))
+
+            if fused is not None:
+                code[self.last_op] = fused
+                code.extend(operands)
+                return
+
+        self.last_op = len(code)
+        code.append(op)
+        code.extend(operands)
+
+    def position(self):
+        self.barrier = len(self.current.code)
+        return self.barrier
+
+    def emitJump(self, op):
+        self.emit(op, -1)
+        return len(self.current.code) - 1
+
+    def emitJumpIfFalse(self):
+        code = self.current.code
+
+        # funde a comparação anterior com o desvio, se nenhum salto cair entre os dois
+        if self.last_op >= 0 and self.barrier != len(code) and code[self.last_op] in BRANCH_OPCODES:
+            code[self.last_op] = BRANCH_OPCODES[code[self.last_op]]
+            code.append(-1)
+            return len(code) - 1
+
+        return self.emitJump(Op.JUMP_IF_FALSE)
+
+    def patch(self, operand):
+        self.barrier = len(self.current.code)
+        self.current.code[operand] = self.barrier
+
+    def constant(self, value):
+        # True == 1 em Python, então o tipo entra na chave
+        key = (type(value), value)
+
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+
+        return self.constant_index[key]
+
+    def compileFunction(self, func_node):
+        index = self.function_index[func_node.value]
+        bytecode = self.functions[index][0]
+        self.begin(bytecode)
+        self.current_function = func_node
+        func_node.children[-1].Compile(self)
+
+        if func_node.return_type == "void":
+            self.emit(Op.CONST, self.constant(None))
+            self.emit(Op.RETURN)
+        else:
+            error = TypeError(
+                f"Tipo de retorno da função '{func_node.value}' incompatível. "
+                f"Esperado '{func_node.return_type}', recebido 'void'."
+            )
+            self.emit(Op.RAISE, self.constant(error))
 
-    arquivo = sys.argv[1]
+        bytecode.nlocals = func_node.nlocals
+        bytecode.slot_names = func_node.slot_names
+        bytecode.padding = [None] * (bytecode.nlocals - 1 - bytecode.nparams)
 
+    def compileProgram(self, root, main_call):
+        entry = BytecodeFunction("<init>", 0, "void")
+        self.begin(entry)
+
+        # 1) VARs de nível superior, na ordem em que aparecem
+        for node in root.children:
+            if isinstance(node, VarDeC):
+                node.Compile(self)
+
+        # 2) numera as funções antes de compilar os corpos (recursão)
+        for node in root.children:
+            if isinstance(node, FuncDec):
+                self.function_index[node.value] = len(self.functions)
+                bytecode = BytecodeFunction(node.value, len(node.children) - 1, node.return_type)
+                self.functions.append((bytecode, node))
+
+        # 3) chama main
+        main_call.Compile(self)
+        self.emit(Op.POP)
+        self.emit(Op.HALT)
+
+        # 4) corpos das funções
+        for _, node in self.functions:
+            node.Compile(self)
+
+        return BytecodeProgram(entry, [bytecode for bytecode, _ in self.functions], self.constants, root.global_names)
+
+
+class VM:
+    # experimental: o despacho custa mais que um Evaluate especializado, então só ganha da
+    # árvore onde as chamadas dominam (quadros próprios, sem a pilha do Python); em laços
+    # aritméticos continua mais lenta, mesmo com as superinstruções
+    def __init__(self, program: BytecodeProgram, stream=None):
+        self.program = program
+        self.globals = [None] * len(program.global_names)
+        self.stream = stream or ProgramIO.current
+
+    @staticmethod
+    def unassigned(func, slot):
+        return Exception(f"Variable '{func.slot_names[slot]}' used before assignment.")
+
+    def run(self):
+        (HALT, CONST, LOAD, STORE, CLEAR, GLOAD, GSTORE, GCLEAR, ADD, SUB, MUL, DIV, NEG, NOT,
+         EQ, LT, GT, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP, BOOLSTR, CONCAT, PRINT, PRINT_BOOL, READ, JUMP, JUMP_IF_FALSE,
+         CALL, RETURN, POP, RAISE, ADDK, SUBK, MULK, EQK, LTK, GTK, JUMP_IF_NOT_EQ, JUMP_IF_NOT_LT,
+         JUMP_IF_NOT_GT, JUMP_IF_NOT_EQK, JUMP_IF_NOT_LTK, JUMP_IF_NOT_GTK, DIVK,
+         ADDL, SUBL, MULL, DIVL, EQL, LTL, GTL, ADDLK, SUBLK, MULLK, DIVLK, EQLK, LTLK, GTLK,
+         JUMP_IF_NOT_EQL, JUMP_IF_NOT_LTL, JUMP_IF_NOT_GTL,
+         JUMP_IF_NOT_EQLK, JUMP_IF_NOT_LTLK, JUMP_IF_NOT_GTLK, STORE_ADDLK, STORE_SUBLK) = range(65)
+
+        program = self.program
+        constants = program.constants
+        functions = program.functions
+        global_vars = self.globals
+        unassigned = self.unassigned
+
+        func = program.entry
+        code = func.code
+        local_vars = []
+        pc = 0
+        stack = []
+        frames = []
+        push = stack.append
+        pop = stack.pop
+        write = self.stream.write
+        read_int = self.stream.readInt
+
+        # cada falha na cadeia custa uma comparação: as instruções mais executadas vêm
+        # primeiro (ordem medida nos programas do bench) e as de E/S e erro por último
+        while True:
+            op = code[pc]
+
+            if op == LOAD:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value)
+                pc += 2
+            elif op == STORE:
+                local_vars[code[pc + 1]] = pop()
+                pc += 2
+            elif op == CONST:
+                push(constants[code[pc + 1]])
+                pc += 2
+            elif op == STORE_ADDLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                local_vars[code[pc + 3]] = value + constants[code[pc + 2]]
+                pc += 4
+            elif op == JUMP_IF_NOT_LTLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if value < constants[code[pc + 2]]:
+                    pc += 4
+                else:
+                    pc = code[pc + 3]
+            elif op == SUBLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value - constants[code[pc + 2]])
+                pc += 3
+            elif op == ADDLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value + constants[code[pc + 2]])
+                pc += 3
+            elif op == CALL:
+                callee = functions[code[pc + 1]]
+                frames.append((func, code, pc + 2, local_vars))
+
+                # mesmo layout do Resolver: slot 0 reservado, depois os parâmetros
+                nparams = callee.nparams
+                if nparams:
+                    local_vars = [None, *stack[-nparams:], *callee.padding]
+                    del stack[-nparams:]
+                else:
+                    local_vars = [None, *callee.padding]
+
+                func = callee
+                code = callee.code
+                pc = 0
+            elif op == RETURN:
+                # o valor de retorno fica no topo da pilha para quem chamou
+                func, code, pc, local_vars = frames.pop()
+            elif op == JUMP:
+                pc = code[pc + 1]
+            elif op == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+                pc += 1
+            elif op == SUB:
+                right = pop()
+                stack[-1] = stack[-1] - right
+                pc += 1
+            elif op == JUMP_IF_NOT_EQLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if value == constants[code[pc + 2]]:
+                    pc += 4
+                else:
+                    pc = code[pc + 3]
+            elif op == JUMP_IF_NOT_GTLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if value > constants[code[pc + 2]]:
+                    pc += 4
+                else:
+                    pc = code[pc + 3]
+            elif op == STORE_SUBLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                local_vars[code[pc + 3]] = value - constants[code[pc + 2]]
+                pc += 4
+            elif op == MULLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value * constants[code[pc + 2]])
+                pc += 3
+            elif op == ADDL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] + value
+                pc += 2
+            elif op == SUBL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] - value
+                pc += 2
+            elif op == MULL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] * value
+                pc += 2
+            elif op == JUMP_IF_NOT_LTL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if pop() < value:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == JUMP_IF_NOT_GTL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if pop() > value:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == JUMP_IF_NOT_EQL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if pop() == value:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == GLOAD:
+                value = global_vars[code[pc + 1]]
+                if value is None:
+                    raise Exception(f"Variable '{program.global_names[code[pc + 1]]}' used before assignment.")
+                push(value)
+                pc += 2
+            elif op == GSTORE:
+                global_vars[code[pc + 1]] = pop()
+                pc += 2
+            elif op == JUMP_IF_FALSE:
+                if pop():
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif op == MUL:
+                right = pop()
+                stack[-1] = stack[-1] * right
+                pc += 1
+            elif op == DIVLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value // constants[code[pc + 2]])
+                pc += 3
+            elif op == DIVK:
+                stack[-1] = stack[-1] // constants[code[pc + 1]]
+                pc += 2
+            elif op == DIVL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                if value == 0:
+                    raise ZeroDivisionError("Erro: divisão por zero.")
+                stack[-1] = stack[-1] // value
+                pc += 2
+            elif op == DIV:
+                right = pop()
+                if right == 0:
+                    raise ZeroDivisionError("Erro: divisão por zero.")
+                stack[-1] = stack[-1] // right
+                pc += 1
+            elif op == ADDK:
+                stack[-1] = stack[-1] + constants[code[pc + 1]]
+                pc += 2
+            elif op == SUBK:
+                stack[-1] = stack[-1] - constants[code[pc + 1]]
+                pc += 2
+            elif op == MULK:
+                stack[-1] = stack[-1] * constants[code[pc + 1]]
+                pc += 2
+            elif op == JUMP_IF_NOT_LTK:
+                if pop() < constants[code[pc + 1]]:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == JUMP_IF_NOT_EQK:
+                if pop() == constants[code[pc + 1]]:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == JUMP_IF_NOT_GTK:
+                if pop() > constants[code[pc + 1]]:
+                    pc += 3
+                else:
+                    pc = code[pc + 2]
+            elif op == JUMP_IF_NOT_LT:
+                right = pop()
+                if pop() < right:
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif op == JUMP_IF_NOT_EQ:
+                right = pop()
+                if pop() == right:
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif op == JUMP_IF_NOT_GT:
+                right = pop()
+                if pop() > right:
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif op == EQLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value == constants[code[pc + 2]])
+                pc += 3
+            elif op == LTLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value < constants[code[pc + 2]])
+                pc += 3
+            elif op == GTLK:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                push(value > constants[code[pc + 2]])
+                pc += 3
+            elif op == EQL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] == value
+                pc += 2
+            elif op == LTL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] < value
+                pc += 2
+            elif op == GTL:
+                value = local_vars[code[pc + 1]]
+                if value is None:
+                    raise unassigned(func, code[pc + 1])
+                stack[-1] = stack[-1] > value
+                pc += 2
+            elif op == EQK:
+                stack[-1] = stack[-1] == constants[code[pc + 1]]
+                pc += 2
+            elif op == LTK:
+                stack[-1] = stack[-1] < constants[code[pc + 1]]
+                pc += 2
+            elif op == GTK:
+                stack[-1] = stack[-1] > constants[code[pc + 1]]
+                pc += 2
+            elif op == EQ:
+                right = pop()
+                stack[-1] = stack[-1] == right
+                pc += 1
+            elif op == LT:
+                right = pop()
+                stack[-1] = stack[-1] < right
+                pc += 1
+            elif op == GT:
+                right = pop()
+                stack[-1] = stack[-1] > right
+                pc += 1
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+                pc += 1
+            elif op == NOT:
+                stack[-1] = not stack[-1]
+                pc += 1
+            elif op == JUMP_IF_FALSE_OR_POP:
+                if stack[-1]:
+                    pop()
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif op == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    pc = code[pc + 1]
+                else:
+                    pop()
+                    pc += 2
+            elif op == POP:
+                pop()
+                pc += 1
+            elif op == CLEAR:
+                local_vars[code[pc + 1]] = None
+                pc += 2
+            elif op == GCLEAR:
+                global_vars[code[pc + 1]] = None
+                pc += 2
+            elif op == BOOLSTR:
+                stack[-1] = "true" if stack[-1] else "false"
+                pc += 1
+            elif op == CONCAT:
+                right = pop()
+                stack[-1] = StrBuilder.concat(stack[-1], right)
+                pc += 1
+            elif op == PRINT:
+                write(str(pop()))
+                pc += 1
+            elif op == PRINT_BOOL:
+                write("true" if pop() else "false")
+                pc += 1
+            elif op == READ:
+                push(read_int())
+                pc += 1
+            elif op == RAISE:
+                raise constants[code[pc + 1]]
+            elif op == HALT:
+                return
+            else:
+                raise ValueError(f"Opcode desconhecido: {op}")
+
+def compileAndRun(arquivo, options):
     if not arquivo.endswith('.zig'):
         raise ValueError("O arquivo deve ter a extensão '.zig'.")
 
@@ -1178,4 +4222,142 @@ if __name__ == "__main__":
         expressao = file.read()
 
     expressao = PrePro.filter(expressao)
-    Parser.run(expressao)
\ No newline at end of file
+
+    cache = None if options.no_cache else CompilationCache(options.cache_dir)
+
+    if options.dce_stats:
+        root, _ = Parser.analyze(expressao, cache)
+        print(f"código morto: {root.dead_nodes} nós removidos", file=sys.stderr)
+
+    # num terminal, ler em blocos esperaria o bloco inteiro antes de responder
+    interactive = options.interactive or sys.stdin.isatty()
+
+    if options.asm:
+        removed = Parser.geracodigo(expressao, arquivo, options.level, cache)
+
+        if options.peephole_stats:
+            for rule, count in removed.items():
+                print(f"{rule}: {count}", file=sys.stderr)
+            print(f"total: {sum(removed.values())}", file=sys.stderr)
+    elif options.engine == "vm":
+        Parser.runVM(expressao, cache, interactive)
+    else:
+        profiler = Profiler() if options.profile else None
+
+        try:
+            Parser.run(expressao, options.memo_size if options.memo else 0, cache, profiler, interactive)
+        finally:
+            if profiler:
+                profiler.report()
+
+                if options.profile_json:
+                    with open(options.profile_json, "w") as f:
+                        json.dump(profiler.toJSON(), f, indent=2)
+
+                if options.profile_collapsed:
+                    profiler.writeCollapsed(options.profile_collapsed)
+
+
+def batchWorker(arquivo, options):
+    # cada programa tem a própria saída; reader() vê uma entrada vazia
+    sys.stdin = io.StringIO()
+    out, err = io.StringIO(), io.StringIO()
+    status = "ok"
+    start = time.perf_counter()
+
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            compileAndRun(arquivo, options)
+        except Exception as e:
+            status = "erro"
+            print(f"{type(e).__name__}: {e}", file=err)
+
+    return arquivo, status, out.getvalue(), err.getvalue(), time.perf_counter() - start
+
+
+def positiveInt(text):
+    value = int(text)
+
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1, recebido {value}")
+
+    return value
+
+
+def expandFiles(patterns):
+    arquivos = []
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            arquivos += sorted(glob.glob(os.path.join(pattern, "*.zig")))
+        elif glob.has_magic(pattern):
+            arquivos += sorted(glob.glob(pattern))
+        else:
+            arquivos.append(pattern)
+
+    return arquivos
+
+
+def runBatch(arquivos, options):
+    start = time.perf_counter()
+    failures = 0
+    busy = 0.0
+
+    with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+        # map devolve na ordem dos arquivos, à medida que cada um termina
+        for arquivo, status, out, err, elapsed in pool.map(batchWorker, arquivos, repeat(options)):
+            print(f"== {arquivo}: {status} ({elapsed:.3f}s)")
+            sys.stdout.write(out)
+            sys.stdout.write(err)
+            failures += status != "ok"
+            busy += elapsed
+
+    print(f"== {len(arquivos)} arquivos: {len(arquivos) - failures} ok, {failures} com erro, "
+          f"{time.perf_counter() - start:.3f}s no total ({busy:.3f}s somando os programas)")
+    return failures
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(usage="python main.py [opções] arquivo.zig [arquivo.zig | diretório | glob ...]")
+    arg_parser.add_argument("arquivos", nargs="+")
+    arg_parser.add_argument("--engine", choices=["ast", "vm"], default="ast",
+                            help="ast: interpretador da árvore (padrão); vm (experimental): bytecode + máquina de "
+                                 "pilha, mais rápida só em código dominado por chamadas e sem limite de recursão")
+    arg_parser.add_argument("--memo", action="store_true",
+                            help="memoiza funções puras no interpretador da árvore e mostra acertos/falhas ao final")
+    arg_parser.add_argument("--memo-size", type=positiveInt, default=100000,
+                            help="entradas do cache LRU de cada função memoizada (padrão: 100000)")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="mede o interpretador da árvore por tipo de nó, função, while e chamada")
+    arg_parser.add_argument("--profile-json", metavar="ARQUIVO", help="grava o perfil em JSON (com --profile)")
+    arg_parser.add_argument("--profile-collapsed", metavar="ARQUIVO",
+                            help="grava pilhas colapsadas para flame graph (com --profile)")
+    arg_parser.add_argument("--interactive", action="store_true",
+                            help="sem buffer de E/S: cada print sai na hora e reader() lê uma linha por vez "
+                                 "(padrão quando a entrada é um terminal)")
+    arg_parser.add_argument("--asm", action="store_true",
+                            help="gera o Assembly x86 (arquivo.asm) em vez de executar o programa")
+    arg_parser.add_argument("-O", dest="level", type=int, choices=sorted(Peephole.LEVELS), default=2,
+                            help="nível do otimizador peephole do Assembly (padrão: 2)")
+    arg_parser.add_argument("--peephole-stats", action="store_true",
+                            help="mostra quantas instruções cada regra do peephole removeu")
+    arg_parser.add_argument("--dce-stats", action="store_true",
+                            help="mostra quantos nós a eliminação de código morto removeu")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="ignora o cache de compilação (não lê nem grava)")
+    arg_parser.add_argument("--clear-cache", action="store_true",
+                            help="apaga o cache de compilação antes de executar")
+    arg_parser.add_argument("--cache-dir", default=".zigcache",
+                            help="diretório do cache de compilação (padrão: .zigcache)")
+    arg_parser.add_argument("--jobs", type=positiveInt, default=None,
+                            help="processos usados com vários arquivos (padrão: um por núcleo)")
+    args = arg_parser.parse_args()
+
+    if args.clear_cache:
+        CompilationCache(args.cache_dir).clear()
+
+    # um único arquivo roda direto no processo, com entrada e erros normais
+    if len(args.arquivos) == 1 and not os.path.isdir(args.arquivos[0]) and not glob.has_magic(args.arquivos[0]):
+        compileAndRun(args.arquivos[0], args)
+    else:
+        sys.exit(1 if runBatch(expandFiles(args.arquivos), args) else 0)